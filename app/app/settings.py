@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -89,6 +90,89 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+CACHE_BACKEND = os.environ.get(
+    'CACHE_BACKEND',
+    'django.core.cache.backends.locmem.LocMemCache'
+)
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+    # Versions of the users' data, which the cached lists, ETags and
+    # local indexes are keyed on. They never expire, and in production
+    # they must be in a cache shared by all workers, or the other
+    # workers keep serving data older than a write
+    'recipe_versions': {
+        'BACKEND': os.environ.get(
+            'RECIPE_VERSION_CACHE_BACKEND', CACHE_BACKEND
+        ),
+        'LOCATION': os.environ.get(
+            'RECIPE_VERSION_CACHE_LOCATION',
+            os.environ.get('CACHE_LOCATION', 'recipe-versions')
+        ),
+        'TIMEOUT': None,
+    },
+    # Cached list responses, only ever read under the current version
+    'recipe_lists': {
+        'BACKEND': os.environ.get('RECIPE_LIST_CACHE_BACKEND', CACHE_BACKEND),
+        'LOCATION': os.environ.get(
+            'RECIPE_LIST_CACHE_LOCATION',
+            os.environ.get('CACHE_LOCATION', 'recipe-lists')
+        ),
+    },
+}
+
+RECIPE_VERSION_CACHE_ALIAS = 'recipe_versions'
+# A versions cache local to the process fails the checks unless allowed,
+# which is only safe with the single process of the development server
+RECIPE_VERSION_CACHE_ALLOW_LOCAL = DEBUG
+RECIPE_CACHE_ALIAS = 'recipe_lists'
+RECIPE_CACHE_TIMEOUT = 300
+RECIPE_BULK_MAX_ITEMS = 5000
+RECIPE_EXPORT_CHUNK_SIZE = 500
+RECIPE_IMPORT_CHUNK_SIZE = 1000
+# Dotted path of the search engine, by default the one of the database
+RECIPE_SEARCH_ENGINE = os.environ.get('RECIPE_SEARCH_ENGINE', '')
+RECIPE_SEARCH_CONFIG = 'english'
+RECIPE_AUTOCOMPLETE_LIMIT = 10
+RECIPE_AUTOCOMPLETE_MAX_LIMIT = 50
+RECIPE_AUTOCOMPLETE_FUZZY_MIN_LENGTH = 3
+RECIPE_PANTRY_LIMIT = 20
+RECIPE_PANTRY_MAX_LIMIT = 100
+RECIPE_SYNC_PAGE_SIZE = 500
+RECIPE_SYNC_MAX_PAGE_SIZE = 5000
+# Indexes of a user's data kept in each process for autocomplete and
+# pantry matching
+RECIPE_LOCAL_INDEXES_MAX = 100
+RECIPE_LOCAL_INDEXES_TIMEOUT = 300
+
+RECIPE_IMAGE_VARIANTS = {'thumbnail': 128, 'medium': 512, 'large': 1024}
+RECIPE_IMAGE_FORMAT = os.environ.get('RECIPE_IMAGE_FORMAT', 'WEBP')
+RECIPE_IMAGE_QUALITY = 85
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+RECIPE_IMAGE_PROCESS_ASYNC = True
+RECIPE_IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+RECIPE_IMAGE_MAX_PIXELS = 5000 * 5000
+
+# Revoked tokens are only dropped from this cache, other workers accept
+# them until the timeout unless the cache is shared between them
+AUTH_TOKEN_CACHE_ALIAS = 'default'
+AUTH_TOKEN_CACHE_TIMEOUT = 60
+
+# Responses are compressed with brotli when it is installed, else gzip
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+COMPRESSION_CACHE_ALIAS = 'default'
+COMPRESSION_CACHE_TIMEOUT = 300
+COMPRESSION_CACHE_MAX_SIZE = 1024 * 1024
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -131,5 +215,33 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# Either 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache, lighttpd)
+# to let the web server send the media files
+MEDIA_SENDFILE_BACKEND = os.environ.get('MEDIA_SENDFILE_BACKEND', '')
+MEDIA_ACCEL_REDIRECT_LOCATION = '/internal-media/'
+MEDIA_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
 AUTH_USER_MODEL = 'core.User'
 
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'recipe.pagination.RecipeCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'core.renderers.MessagePackRenderer',
+        'core.renderers.CBORRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'core.parsers.MessagePackParser',
+        'core.parsers.CBORParser',
+    ),
+}
+
+# Either 'orjson', used when it is installed, or 'json' for the
+# standard library
+API_JSON_BACKEND = os.environ.get('API_JSON_BACKEND', 'orjson')
+
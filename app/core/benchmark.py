@@ -0,0 +1,76 @@
+import random
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from core.models import Tag, Ingredient, Recipe, RecipeTag, RecipeIngredient
+from core.utils import bulk_create
+
+
+@contextmanager
+def throwaway_dataset(**sizes):
+    """Seeds a dataset for a fresh user and rolls it back afterwards"""
+    with transaction.atomic():
+        user = get_user_model().objects.create_user(
+            email='benchmark@example.com',
+            password='benchmark'
+        )
+        seed_dataset(user, **sizes)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        try:
+            yield user
+        finally:
+            transaction.set_rollback(True)
+
+
+def seed_dataset(user, recipes=1000, tags=100, ingredients=300,
+                 links_per_recipe=5):
+    """Creates recipes linked to random tags and ingredients of a user"""
+    bulk_create(Tag, (Tag(user=user, name=f'Tag {i}') for i in range(tags)))
+    bulk_create(Ingredient, (
+        Ingredient(user=user, name=f'Ingredient {i}')
+        for i in range(ingredients)
+    ))
+    bulk_create(Recipe, (
+        Recipe(user=user, title=f'Recipe {i}', time_minutes=30, price=10)
+        for i in range(recipes)
+    ))
+
+    tag_ids = list(Tag.objects.filter(user=user).values_list('id', flat=True))
+    ingredient_ids = list(
+        Ingredient.objects.filter(user=user).values_list('id', flat=True)
+    )
+    recipe_ids = Recipe.objects.filter(user=user).values_list('id', flat=True)
+
+    rng = random.Random(0)
+    recipe_tags = []
+    recipe_ingredients = []
+    for recipe_id in recipe_ids:
+        for tag_id in rng.sample(tag_ids, min(links_per_recipe, tags)):
+            recipe_tags.append(RecipeTag(recipe_id=recipe_id, tag_id=tag_id))
+        for ingredient_id in rng.sample(
+                ingredient_ids, min(links_per_recipe, ingredients)):
+            recipe_ingredients.append(RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id
+            ))
+    bulk_create(RecipeTag, recipe_tags)
+    bulk_create(RecipeIngredient, recipe_ingredients)
+    # The links were created in bulk, bypassing the signals counting them
+    Tag.objects.filter(user=user).update_recipe_counts()
+    Ingredient.objects.filter(user=user).update_recipe_counts()
+
+
+def timed(func, repeat=5):
+    """Returns the best wall time of func over a number of runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
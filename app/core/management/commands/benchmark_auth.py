@@ -0,0 +1,53 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from user.authentication import CachingTokenAuthentication, forget_token
+
+
+class Command(BaseCommand):
+    """Django command comparing queries and time per request of
+    the plain and the caching token authentication"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email='benchmark@example.com',
+                password='benchmark'
+            )
+            token = Token.objects.create(user=user)
+            request = APIRequestFactory().get(
+                '/api/recipe/recipes/',
+                HTTP_AUTHORIZATION=f'Token {token.key}'
+            )
+            forget_token(token.key)
+
+            self.stdout.write(
+                'authentication                queries/req  ms/req'
+            )
+            for authentication in (TokenAuthentication(),
+                                   CachingTokenAuthentication()):
+                self.write_row(authentication, request, options['requests'])
+            forget_token(token.key)
+            transaction.set_rollback(True)
+
+    def write_row(self, authentication, request, requests):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(requests):
+                authentication.authenticate(request)
+            elapsed = time.perf_counter() - start
+        self.stdout.write('{:<29} {:<12.3f} {:.4f}'.format(
+            type(authentication).__name__,
+            len(queries) / requests,
+            elapsed * 1000 / requests
+        ))
@@ -0,0 +1,75 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.benchmark import throwaway_dataset, timed
+from core.models import Tag
+from core.utils import bulk_create
+from recipe import cache
+from recipe.autocomplete import complete_names
+
+
+class Command(BaseCommand):
+    """Django command measuring the autocomplete latency for a user
+    with many tags"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=50000)
+        parser.add_argument('--queries', type=int, default=1000)
+        parser.add_argument('--limit', type=int, default=10)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with throwaway_dataset(recipes=0, tags=0, ingredients=0) as user:
+            names = self.random_names(rng, options['items'])
+            bulk_create(Tag, (Tag(user=user, name=name) for name in names))
+            cache.invalidate(user.id, cache.TAGS)
+
+            build = timed(lambda: self.complete(user, 'a', options),
+                          repeat=1)
+            self.stdout.write(f'index build   {build * 1000:.1f} ms')
+
+            samples = rng.sample(names, options['queries'])
+            self.write_row('prefix', [
+                name[:rng.randint(1, 4)] for name in samples
+            ], user, options)
+            self.write_row('typo', [
+                self.typo(rng, name[:rng.randint(4, 8)]) for name in samples
+            ], user, options)
+        self.stdout.write(self.style.SUCCESS('Dataset rolled back'))
+
+    def random_names(self, rng, count):
+        names = set()
+        while len(names) < count:
+            words = rng.randint(1, 3)
+            names.add(' '.join(
+                ''.join(rng.choice(string.ascii_lowercase)
+                        for _ in range(rng.randint(3, 9))).capitalize()
+                for _ in range(words)
+            ))
+        return sorted(names)
+
+    def typo(self, rng, word):
+        position = rng.randrange(len(word))
+        return word[:position] + rng.choice(string.ascii_lowercase) + \
+            word[position + 1:]
+
+    def complete(self, user, query, options):
+        return complete_names(Tag, user.id, cache.TAGS, query,
+                              options['limit'])
+
+    def write_row(self, kind, queries, user, options):
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            self.complete(user, query, options)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        self.stdout.write(
+            f'{kind:<13} p50 {p50:.3f} ms  p99 {p99:.3f} ms  '
+            f'max {latencies[-1]:.3f} ms'
+        )
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from core.benchmark import throwaway_dataset, timed
+from core.models import Tag, Ingredient, Recipe
+
+
+class Command(BaseCommand):
+    """Django command comparing the joined and the semi-joined
+    recipe filters as the number of filter ids grows"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=20000)
+        parser.add_argument('--sizes', default='1,5,10,25,50')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        with throwaway_dataset(
+                recipes=options['recipes'],
+                tags=max(sizes),
+                ingredients=max(sizes)) as user:
+            tag_ids = list(Tag.objects.filter(user=user)
+                           .values_list('id', flat=True))
+            ingredient_ids = list(Ingredient.objects.filter(user=user)
+                                  .values_list('id', flat=True))
+            recipes = Recipe.objects.filter(user=user)
+
+            self.stdout.write('ids  shape       rows      seconds')
+            for size in sizes:
+                joined = recipes.filter(
+                    tags__id__in=tag_ids[:size]
+                ).filter(
+                    ingredients__id__in=ingredient_ids[:size]
+                )
+                semi_joined = recipes.with_tags(
+                    tag_ids[:size]
+                ).with_ingredients(
+                    ingredient_ids[:size]
+                )
+                self.write_row(size, 'join', joined)
+                self.write_row(size, 'semi-join', semi_joined)
+        self.stdout.write(self.style.SUCCESS('Dataset rolled back'))
+
+    def write_row(self, size, shape, queryset):
+        rows = len(queryset.values_list('id', flat=True))
+        seconds = timed(lambda: list(queryset.values_list('id', flat=True)))
+        self.stdout.write(f'{size:<4} {shape:<10} {rows:<9} {seconds:.4f}')
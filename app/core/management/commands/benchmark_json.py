@@ -0,0 +1,40 @@
+import io
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from core.benchmark import timed
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    """Django command comparing the JSON rendering and parsing time of
+    orjson and the standard library over recipe list payloads"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,100,1000,10000')
+
+    def handle(self, *args, **options):
+        renderer = FastJSONRenderer()
+        parser = FastJSONParser()
+        self.stdout.write('recipes  backend  bytes       render ms  parse ms')
+        for size in [int(size) for size in options['sizes'].split(',')]:
+            payload = {'next': None, 'previous': None, 'results': [{
+                'id': i,
+                'title': f'Recipe {i}',
+                'price': '10.50',
+                'time_minutes': 30,
+                'ingredients': list(range(i, i + 5)),
+                'tags': list(range(i, i + 5)),
+                'image_variants': None,
+            } for i in range(size)]}
+            for backend in ('json', 'orjson'):
+                with override_settings(API_JSON_BACKEND=backend):
+                    body = renderer.render(payload)
+                    render = timed(lambda: renderer.render(payload))
+                    parse = timed(lambda: parser.parse(io.BytesIO(body)))
+                self.stdout.write(
+                    f'{size:<8} {backend:<8} {len(body):<11} '
+                    f'{render * 1000:<10.2f} {parse * 1000:.2f}'
+                )
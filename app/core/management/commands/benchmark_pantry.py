@@ -0,0 +1,65 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Q
+
+from core.benchmark import throwaway_dataset, timed
+from core.models import Ingredient, RecipeIngredient
+from recipe.pantry import match_pantry
+
+
+class Command(BaseCommand):
+    """Django command comparing the pantry matching of the in-process
+    inverted index with an aggregate query per request"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=20000)
+        parser.add_argument('--ingredients', type=int, default=300)
+        parser.add_argument('--links', type=int, default=8)
+        parser.add_argument('--pantry-sizes', default='5,20,50')
+        parser.add_argument('--missing', type=int, default=2)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        sizes = [int(size) for size in options['pantry_sizes'].split(',')]
+        with throwaway_dataset(
+                recipes=options['recipes'],
+                tags=0,
+                ingredients=options['ingredients'],
+                links_per_recipe=options['links']) as user:
+            ingredient_ids = list(Ingredient.objects.filter(user=user)
+                                  .values_list('id', flat=True))
+            build = timed(lambda: match_pantry(user.id, [], 0, 20), repeat=1)
+            self.stdout.write(f'index build  {build * 1000:.1f} ms')
+
+            self.stdout.write('pantry  engine     matches  ms')
+            for size in sizes:
+                pantry = rng.sample(ingredient_ids, size)
+                self.write_row(size, 'index', lambda: match_pantry(
+                    user.id, pantry, options['missing'], 20
+                )[0])
+                self.write_row(size, 'aggregate', lambda: len(
+                    self.aggregate(user, pantry, options['missing'])
+                ))
+        self.stdout.write(self.style.SUCCESS('Dataset rolled back'))
+
+    def aggregate(self, user, pantry, max_missing):
+        return list(
+            RecipeIngredient.objects.filter(recipe__user=user)
+                                    .values('recipe_id')
+                                    .annotate(
+                                        total=Count('id'),
+                                        have=Count('id', filter=Q(
+                                            ingredient_id__in=pantry
+                                        )))
+                                    .filter(total__lte=F('have') +
+                                            max_missing)
+                                    .values_list('recipe_id', flat=True)
+        )
+
+    def write_row(self, size, engine, run):
+        matches = run()
+        seconds = timed(run)
+        self.stdout.write(
+            f'{size:<7} {engine:<10} {matches:<8} {seconds * 1000:.2f}'
+        )
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.benchmark import throwaway_dataset, timed
+from core.models import Tag, Ingredient, Recipe
+from recipe import serializers
+from recipe.rows import RowSerializer
+
+
+class Command(BaseCommand):
+    """Django command comparing the rows per second of the list
+    endpoints serialized from model instances and from values() rows"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--page-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory().get('/'))
+        size = options['page_size']
+        with throwaway_dataset(recipes=options['recipes'],
+                               tags=500,
+                               ingredients=1000) as user:
+            recipes = Recipe.objects.filter(user=user).order_by('-id')
+            endpoints = [
+                ('recipes', serializers.RecipeSerializer,
+                 recipes.with_related_ids(), {}),
+                ('recipes?expand', serializers.RecipeSerializer,
+                 recipes.with_related_objects(),
+                 {'expand': ['tags', 'ingredients']}),
+                ('tags', serializers.TagSerializer,
+                 Tag.objects.filter(user=user).order_by('-name'), {}),
+                ('ingredients', serializers.IngredientSerializer,
+                 Ingredient.objects.filter(user=user).order_by('-name'), {}),
+            ]
+
+            self.stdout.write('endpoint         serializer  rows/s')
+            for name, serializer_class, queryset, context in endpoints:
+                context['request'] = request
+                self.write_row(name, 'model', lambda: serializer_class(
+                    queryset[:size], many=True, context=context
+                ).data)
+                rows = RowSerializer(serializer_class(context=context))
+                self.write_row(name, 'rows', lambda: rows.to_representation(
+                    queryset.prefetch_related(None)
+                            .values(*rows.columns)[:size]
+                ))
+        self.stdout.write(self.style.SUCCESS('Dataset rolled back'))
+
+    def write_row(self, endpoint, serializer, run):
+        count = len(run())
+        seconds = timed(run)
+        self.stdout.write(
+            f'{endpoint:<16} {serializer:<11} {count / seconds:,.0f}'
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from recipe.images import collect_garbage
+
+
+class Command(BaseCommand):
+    """Django command deleting the recipe images no recipe references"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Keep images modified less than this many seconds ago'
+        )
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only list the unreferenced images')
+
+    def handle(self, *args, **options):
+        deleted = collect_garbage(options['min_age'], options['dry_run'])
+        for name in deleted:
+            self.stdout.write(name)
+        action = 'Found' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {len(deleted)} unreferenced images'
+        ))
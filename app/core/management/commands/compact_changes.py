@@ -0,0 +1,40 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from core.models import Change
+from recipe.sync import SYNCED_KINDS, record_changes
+
+
+class Command(BaseCommand):
+    """Django command deleting the entries of the change log superseded
+    by a later entry of the same object, which no sync needs anymore"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true',
+                            help='Log the objects without any entry, e.g. '
+                                 'the ones written before the log existed')
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            for kind, (name, model, _) in SYNCED_KINDS.items():
+                missing = model.objects.exclude(
+                    id__in=Change.objects.filter(kind=kind)
+                                         .values('object_id')
+                ).values_list('user_id', 'id')
+                ids_by_user = defaultdict(list)
+                for user_id, object_id in missing.iterator():
+                    ids_by_user[user_id].append(object_id)
+                for user_id, ids in ids_by_user.items():
+                    record_changes(user_id, {model: ids})
+                self.stdout.write(
+                    f'{name}: {sum(map(len, ids_by_user.values()))} logged'
+                )
+
+        latest = Change.objects.values('user_id', 'kind', 'object_id') \
+                               .annotate(latest=Max('id')) \
+                               .values('latest')
+        deleted, _ = Change.objects.exclude(id__in=latest).delete()
+        self.stdout.write(f'{deleted} superseded entries deleted')
+        self.stdout.write(self.style.SUCCESS('Change log compacted'))
@@ -0,0 +1,84 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.benchmark import throwaway_dataset
+from core.models import Tag, Ingredient, Recipe, RecipeTag, RecipeIngredient
+
+
+INDEXED_MODELS = (Tag, Ingredient, Recipe, RecipeTag, RecipeIngredient)
+
+# Default size of the prepared statement cache of sqlite3 connections
+SQLITE_CACHED_STATEMENTS = 128
+
+
+def hot_queries(user):
+    """Returns the query shapes used by the recipe API"""
+    tag_ids = list(Tag.objects.filter(user=user).values_list('id', flat=True))
+    ingredient_ids = list(
+        Ingredient.objects.filter(user=user).values_list('id', flat=True)
+    )
+    return (
+        ('tags list',
+         Tag.objects.filter(user=user).order_by('-name', '-id')[:100]),
+        ('recipes list',
+         Recipe.objects.filter(user=user).order_by('-id')[:100]),
+        ('recipes by tags',
+         Recipe.objects.filter(user=user, tags__id__in=tag_ids[:3])),
+        ('recipes by ingredients',
+         Recipe.objects.filter(
+             user=user,
+             ingredients__id__in=ingredient_ids[:3]
+         )),
+        ('assigned tags',
+         Tag.objects.filter(user=user, recipe_count__gt=0)),
+    )
+
+
+class Command(BaseCommand):
+    """Django command that seeds a throwaway dataset and prints
+    the query plans of the recipe API with and without its indexes"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=50000)
+        parser.add_argument('--tags', type=int, default=500)
+        parser.add_argument('--ingredients', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        self.stdout.write('Seeding dataset ...')
+        with throwaway_dataset(
+                recipes=options['recipes'],
+                tags=options['tags'],
+                ingredients=options['ingredients']) as user:
+            self.write_plans('With indexes', user)
+            self.drop_indexes()
+            self.write_plans('Without indexes', user)
+        self.stdout.write(self.style.SUCCESS('Dataset rolled back'))
+
+    def write_plans(self, heading, user):
+        self.stdout.write(self.style.MIGRATE_HEADING(heading))
+        for name, queryset in hot_queries(user):
+            self.stdout.write(self.style.MIGRATE_LABEL(f'  {name}'))
+            self.stdout.write(queryset.explain())
+
+    def drop_indexes(self):
+        """Drops the composite indexes inside the seeding transaction"""
+        schema_editor = connection.SchemaEditorClass(connection)
+        for model in INDEXED_MODELS:
+            for index in model._meta.indexes:
+                schema_editor.remove_index(model, index)
+        if connection.vendor == 'sqlite':
+            self.evict_cached_statements()
+
+    def evict_cached_statements(self):
+        """Pushes the EXPLAIN statements out of the sqlite3 statement cache.
+
+        A cached EXPLAIN is not prepared again after a schema change, so
+        it would keep printing the plans using the dropped indexes. The
+        connection cannot be closed, that would discard the dataset.
+        """
+        size = connection.settings_dict['OPTIONS'].get(
+            'cached_statements', SQLITE_CACHED_STATEMENTS
+        )
+        with connection.cursor() as cursor:
+            for number in range(size):
+                cursor.execute(f'SELECT {number}')
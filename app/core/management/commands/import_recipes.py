@@ -0,0 +1,79 @@
+import os
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.imports import RECORD_READERS, RecipeImportError, \
+                           import_records
+
+
+class Command(BaseCommand):
+    """Django command importing recipes from an NDJSON or CSV file
+    in chunks, committing and checkpointing after every chunk"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--email', required=True,
+                            help='Owner of the imported recipes')
+        parser.add_argument('--format', choices=sorted(RECORD_READERS),
+                            help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int,
+                            help='Records per transaction, at most '
+                                 'RECIPE_BULK_MAX_ITEMS')
+        parser.add_argument('--skip', type=int, default=0,
+                            help='Number of records already imported')
+        parser.add_argument('--checkpoint',
+                            help='File keeping the number of imported '
+                                 'records, used to resume the import')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}')
+
+        file_format = options['format'] or \
+            os.path.splitext(options['path'])[1].lstrip('.')
+        if file_format not in RECORD_READERS:
+            raise CommandError(f'Unknown format {file_format}')
+
+        chunk_size = options['chunk_size']
+        max_chunk_size = settings.RECIPE_BULK_MAX_ITEMS
+        if chunk_size is not None and not 0 < chunk_size <= max_chunk_size:
+            raise CommandError(
+                f'--chunk-size must be between 1 and {max_chunk_size}'
+            )
+
+        checkpoint = options['checkpoint']
+        skip = options['skip']
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint) as checkpoint_file:
+                skip = int(checkpoint_file.read().strip() or 0)
+            self.stdout.write(f'Resuming after {skip} records')
+        if skip < 0:
+            raise CommandError('--skip must not be negative')
+
+        def progress(imported):
+            if checkpoint:
+                with open(checkpoint, 'w') as checkpoint_file:
+                    checkpoint_file.write(str(imported))
+            self.stdout.write(f'Imported {imported} records')
+
+        with open(options['path'], newline='', encoding='utf-8') as lines:
+            try:
+                imported = import_records(
+                    user,
+                    RECORD_READERS[file_format](lines),
+                    skip=skip,
+                    chunk_size=chunk_size,
+                    progress=progress
+                )
+            except RecipeImportError as error:
+                raise CommandError(
+                    f'{error}. {error.imported} records are imported, '
+                    f'rerun with --skip {error.imported} to resume.'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Import finished, {imported} records imported'
+        ))
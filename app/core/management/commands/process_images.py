@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe.images import process_recipe_image
+
+
+class Command(BaseCommand):
+    """Django command processing the recipe images left pending, e.g.
+    after a restart lost the in-process queue"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true',
+                            help='Also retry the images that failed')
+
+    def handle(self, *args, **options):
+        statuses = [Recipe.IMAGE_PENDING]
+        if options['failed']:
+            statuses.append(Recipe.IMAGE_FAILED)
+        recipe_ids = Recipe.objects.filter(image_status__in=statuses) \
+                                   .exclude(image='') \
+                                   .values_list('id', flat=True)
+        processed = 0
+        for recipe_id in recipe_ids.iterator():
+            process_recipe_image(recipe_id)
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} images'
+        ))
@@ -0,0 +1,35 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from core.models import Tag, Ingredient
+from recipe.sync import record_changes
+
+
+class Command(BaseCommand):
+    """Django command correcting the recipe_count of tags and
+    ingredients that drifted from their links, e.g. after raw SQL
+    writes"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report the wrong counts')
+
+    def handle(self, *args, **options):
+        for model in (Tag, Ingredient):
+            wrong = model.objects.annotate(
+                actual=Count('recipe')
+            ).exclude(recipe_count=F('actual'))
+            ids_by_user = defaultdict(list)
+            for user_id, object_id in wrong.values_list('user_id', 'id'):
+                ids_by_user[user_id].append(object_id)
+            ids = sum(ids_by_user.values(), [])
+            if ids and not options['dry_run']:
+                model.objects.filter(id__in=ids).update_recipe_counts()
+                for user_id, object_ids in ids_by_user.items():
+                    record_changes(user_id, {model: object_ids})
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {len(ids)} wrong counts'
+            )
+        self.stdout.write(self.style.SUCCESS('Recipe counts reconciled'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe.search import get_engine
+
+
+class Command(BaseCommand):
+    """Django command recomputing the search vectors of all recipes,
+    e.g. after the search config changed"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        engine = get_engine()
+        if not engine.maintained:
+            self.stdout.write('The search engine keeps no vectors')
+            return
+
+        recipe_ids = Recipe.objects.order_by('id') \
+                                   .values_list('id', flat=True)
+        last_id, updated = 0, 0
+        while True:
+            batch = recipe_ids.filter(id__gt=last_id)
+            batch = list(batch[:options['batch_size']])
+            if not batch:
+                break
+            engine.update(batch)
+            updated += len(batch)
+            last_id = batch[-1]
+            self.stdout.write(f'Updated {updated} recipes')
+        self.stdout.write(self.style.SUCCESS('Search vectors are up to date'))
@@ -0,0 +1,153 @@
+import hashlib
+import re
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Media types that are already compressed
+INCOMPRESSIBLE_TYPES = re.compile(
+    r'^(image|video|audio)/|^application/(zip|gzip|x-gzip|x-brotli)\b'
+)
+
+
+class GzipCoding:
+    name = 'gzip'
+
+    def compressor(self):
+        # A gzip header and trailer around the deflate stream
+        return zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL,
+                                zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, content):
+        compressor = self.compressor()
+        return compressor.compress(content) + compressor.flush()
+
+    def compress_stream(self, chunks):
+        compressor = self.compressor()
+        for chunk in chunks:
+            data = compressor.compress(chunk) + \
+                compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+class BrotliCoding:
+    name = 'br'
+
+    def compressor(self):
+        return brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, content):
+        return brotli.compress(content,
+                               quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress_stream(self, chunks):
+        compressor = self.compressor()
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+
+
+# In order of preference
+CODINGS = ([BrotliCoding()] if brotli is not None else []) + [GzipCoding()]
+
+
+def accepted_codings(header):
+    """Returns the content codings the Accept-Encoding header allows"""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        match = re.search(r'q=([0-9.]+)', params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    wildcard = accepted.get('*', 0.0)
+    return {coding.name for coding in CODINGS
+            if accepted.get(coding.name, wildcard) > 0}
+
+
+def compressed_cache_key(coding, content):
+    digest = hashlib.sha1(content).hexdigest()
+    return f'compressed:{coding.name}:{digest}'
+
+
+class CompressionMiddleware:
+    """Compresses responses with brotli or gzip, as the client accepts.
+
+    Responses below COMPRESSION_MIN_SIZE, already encoded or of already
+    compressed media types are left alone. Compressed bodies are cached
+    by a digest of their uncompressed content, so a response rendered
+    again with the same bytes, e.g. from a cached list, reuses them
+    instead of being compressed again. Streaming responses are
+    compressed chunk by chunk and stay streaming.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = self.get_coding(request, response)
+        if coding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = coding.compress_stream(
+                response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            content = self.compress(coding, response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        # The compressed bytes are not those the strong ETag stood for
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^"', 'W/"', response['ETag'])
+        response['Content-Encoding'] = coding.name
+        return response
+
+    def get_coding(self, request, response):
+        if (response.status_code != 200 or
+                response.has_header('Content-Encoding') or
+                INCOMPRESSIBLE_TYPES.match(response.get('Content-Type', ''))):
+            return None
+        if not response.streaming and \
+                len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return None
+        accepted = accepted_codings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        for coding in CODINGS:
+            if coding.name in accepted:
+                return coding
+        return None
+
+    def compress(self, coding, content):
+        if len(content) > settings.COMPRESSION_CACHE_MAX_SIZE:
+            return coding.compress(content)
+        cache = caches[settings.COMPRESSION_CACHE_ALIAS]
+        key = compressed_cache_key(coding, content)
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = coding.compress(content)
+            cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+        return compressed
@@ -1,17 +1,22 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser, \
                                         PermissionsMixin
 from django.conf import settings
-import uuid
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 import os
 
+from core.storage import image_storage
+
 
 def recipe_image_file_path(instance, filename):
-    """returns a location for the image file"""
-    ext = filename.split('.')[-1]
-    filename = f'{uuid.uuid4()}.{ext}'
+    """returns a location for the image file, the storage names the file
+    after the hash of its content"""
+    ext = filename.split('.')[-1].lower()
 
-    return os.path.join('uploads/recipe', filename)
+    return os.path.join('uploads/recipe', f'image.{ext}')
 
 
 class UserManager(BaseUserManager):
@@ -47,6 +52,41 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+class RecipeAttrQuerySet(models.QuerySet):
+    """Queries shared by tags and ingredients"""
+
+    def update_recipe_counts(self):
+        """Recounts the recipes linked to each object in one UPDATE"""
+        column = self.model._meta.model_name
+        counts = self.model.recipe_set.through.objects.filter(
+            **{column: models.OuterRef('pk')}
+        ).order_by().values(column).annotate(
+            count=models.Count('*')
+        ).values('count')
+        return self.update(
+            recipe_count=Coalesce(
+                models.Subquery(counts, output_field=models.IntegerField()),
+                0
+            ),
+            updated_at=timezone.now()
+        )
+
+
+def recipe_attr_indexes(prefix):
+    """Indexes serving the assigned_only filter and the count ordering"""
+    return [
+        models.Index(
+            fields=['user', 'name'],
+            name=f'{prefix}_assigned_name_idx',
+            condition=models.Q(recipe_count__gt=0)
+        ),
+        models.Index(
+            fields=['user', '-recipe_count', '-id'],
+            name=f'{prefix}_user_count_idx'
+        ),
+    ]
+
+
 class Tag(models.Model):
     """Tag to be used for a recipe"""
     name = models.CharField(max_length=255)
@@ -54,6 +94,20 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    # Number of linked recipes, see RecipeAttrQuerySet.update_recipe_counts
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = RecipeAttrQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='tag_user_name_uniq'
+            ),
+        ]
+        indexes = recipe_attr_indexes('tag')
 
     def __str__(self):
         return self.name
@@ -66,13 +120,111 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = RecipeAttrQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='ingredient_user_name_uniq'
+            ),
+        ]
+        indexes = recipe_attr_indexes('ingredient')
 
     def __str__(self):
         return self.name
 
 
+def linked_recipe_ids(through, column, ids, match_all=False):
+    """Returns a subquery of the recipes linked to any or all of the ids"""
+    links = through.objects.filter(**{f'{column}__in': ids})
+    if match_all:
+        links = links.values('recipe_id').annotate(
+            matched=models.Count(column, distinct=True)
+        ).filter(matched=len(set(ids)))
+    return links.values('recipe_id')
+
+
+class RecipeQuerySet(models.QuerySet):
+    """Query plans for the different ways recipes are read"""
+
+    def with_tags(self, tag_ids, match_all=False):
+        """Filters recipes having any (or all) of the tags.
+
+        Uses a semi-join on the link table, so a recipe matching several
+        of the tags is still returned only once.
+        """
+        return self.filter(
+            id__in=linked_recipe_ids(RecipeTag, 'tag_id', tag_ids, match_all)
+        )
+
+    def with_ingredients(self, ingredient_ids, match_all=False):
+        """Filters recipes having any (or all) of the ingredients"""
+        return self.filter(id__in=linked_recipe_ids(
+            RecipeIngredient,
+            'ingredient_id',
+            ingredient_ids,
+            match_all
+        ))
+
+    def with_relations(self, ids=(), objects=()):
+        """Prefetches the named relations, with only their primary keys
+        for the ones in `ids` and with their names for `objects`"""
+        lookups = []
+        for name, fields in [(name, ('id',)) for name in ids] + \
+                [(name, ('id', 'name', 'updated_at', 'recipe_count'))
+                 for name in objects]:
+            related = self.model._meta.get_field(name).related_model
+            lookups.append(models.Prefetch(
+                name,
+                queryset=related.objects.only(*fields).order_by('id')
+            ))
+        return self.prefetch_related(*lookups)
+
+    def with_related_ids(self):
+        """Prefetches only the primary keys of tags and ingredients"""
+        return self.with_relations(ids=('tags', 'ingredients'))
+
+    def with_related_objects(self):
+        """Prefetches tags and ingredients with their names"""
+        return self.with_relations(objects=('tags', 'ingredients'))
+
+    def touch(self):
+        """Marks the recipes as modified without sending signals"""
+        return self.update(updated_at=timezone.now())
+
+
+class RecipeManager(models.Manager.from_queryset(RecipeQuerySet)):
+
+    def get_queryset(self):
+        """Leaves out the search vector, which only the database reads"""
+        return super().get_queryset().defer('search_vector')
+
+
+class SearchVectorIndex(GinIndex):
+    """GIN index on PostgreSQL, a plain index on the fallback databases
+    without GIN support"""
+
+    def create_sql(self, model, schema_editor, using=''):
+        if schema_editor.connection.vendor != 'postgresql':
+            return models.Index.create_sql(self, model, schema_editor, using)
+        return super().create_sql(model, schema_editor, using)
+
+
 class Recipe(models.Model):
     """Recipe model"""
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = (
+        (IMAGE_PENDING, 'Pending'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+    )
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
@@ -81,9 +233,103 @@ class Recipe(models.Model):
     price = models.DecimalField(decimal_places=2, max_digits=5)
     time_minutes = models.IntegerField()
     link = models.CharField(max_length=255, blank=True)
-    ingredients = models.ManyToManyField('Ingredient')
-    tags = models.ManyToManyField('Tag')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    ingredients = models.ManyToManyField(
+        'Ingredient',
+        through='RecipeIngredient'
+    )
+    tags = models.ManyToManyField('Tag', through='RecipeTag')
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=image_storage,
+        db_index=True
+    )
+    image_status = models.CharField(
+        max_length=10,
+        blank=True,
+        choices=IMAGE_STATUS_CHOICES
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='recipe_user_id_idx'),
+            SearchVectorIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class RecipeTag(models.Model):
+    """Links a Recipe with a Tag, indexed from both sides"""
+    recipe = models.ForeignKey('Recipe', on_delete=models.CASCADE)
+    tag = models.ForeignKey('Tag', on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = 'core_recipe_tags'
+        unique_together = ('recipe', 'tag')
+        indexes = [
+            models.Index(
+                fields=['tag', 'recipe'],
+                name='recipe_tags_tag_recipe_idx'
+            ),
+        ]
+
+
+class RecipeIngredient(models.Model):
+    """Links a Recipe with an Ingredient, indexed from both sides"""
+    recipe = models.ForeignKey('Recipe', on_delete=models.CASCADE)
+    ingredient = models.ForeignKey('Ingredient', on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = 'core_recipe_ingredients'
+        unique_together = ('recipe', 'ingredient')
+        indexes = [
+            models.Index(
+                fields=['ingredient', 'recipe'],
+                name='recipe_ingr_ingr_recipe_idx'
+            ),
+        ]
+
+
+class Change(models.Model):
+    """Entry of the log of changes to the recipes, tags and ingredients
+    of a user, read by the delta sync.
+
+    The entries are written in the transaction of the change, with the
+    row of the user locked, see recipe.sync.record_changes, so the ids
+    of a user's entries grow in commit order and serve as the sync
+    token. The entries of deleted objects are their tombstones.
+    """
+    RECIPE = 'recipe'
+    TAG = 'tag'
+    INGREDIENT = 'ingredient'
+    KIND_CHOICES = (
+        (RECIPE, 'Recipe'),
+        (TAG, 'Tag'),
+        (INGREDIENT, 'Ingredient'),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    deleted = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='change_user_id_idx'),
+            models.Index(
+                fields=['user', 'kind', 'object_id', 'id'],
+                name='change_object_idx'
+            ),
+        ]
@@ -0,0 +1,101 @@
+import decimal
+
+import cbor2
+import msgpack
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def use_orjson():
+    """Returns whether API_JSON_BACKEND selects orjson and it is
+    installed, the standard library json is used otherwise"""
+    return orjson is not None and settings.API_JSON_BACKEND == 'orjson'
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    """JSON encoder keeping the exact value of decimals.
+
+    Decimals are encoded as strings, as DecimalField represents them,
+    unless COERCE_DECIMAL_TO_STRING is turned off.
+    """
+
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            if api_settings.COERCE_DECIMAL_TO_STRING:
+                return str(obj)
+            return float(obj)
+        return super().default(obj)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSON renderer encoding with orjson when it is selected.
+
+    The output matches the standard library encoding of JSONRenderer.
+    Pretty printed, ASCII only or non compact output, and values orjson
+    cannot encode, fall back to it.
+    """
+    encoder_class = JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (not use_orjson() or indent is not None or self.ensure_ascii or
+                not self.compact):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_NON_STR_KEYS |
+                orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        # Kept a strict javascript subset, as JSONRenderer does
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028') \
+                     .replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+def _to_primitive(obj):
+    """Returns the JSON representation of a value the binary formats
+    cannot encode, so they carry the same data as JSON"""
+    return JSONEncoder().default(obj)
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """Renderer for MessagePack, a compact binary form of the JSON data"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, use_bin_type=True, default=_to_primitive)
+
+
+class CBORRenderer(renderers.BaseRenderer):
+    """Renderer for CBOR, the binary data format of RFC 7049"""
+    media_type = 'application/cbor'
+    format = 'cbor'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return cbor2.dumps(data, default=lambda encoder, value:
+                           encoder.encode(_to_primitive(value)))
@@ -0,0 +1,45 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores every file under the SHA-256 of its content.
+
+    The directory and extension of the requested name are kept, the
+    rest becomes `ab/cd/abcd...` so no directory grows too large.
+    Saving content that is already stored skips the write and returns
+    the existing name, which makes identical uploads share one file.
+    Files are never deleted on replacement because other rows may point
+    at them; see `recipe.images.collect_garbage`.
+    """
+
+    def content_name(self, name, content):
+        sha256 = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        content.seek(0)
+        digest = sha256.hexdigest()
+        ext = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            os.path.dirname(name),
+            digest[:2],
+            digest[2:4],
+            digest + ext
+        )
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Restarts the grace period of the garbage collection, as
+            # the file is about to be referenced again
+            os.utime(self.path(name))
+            return name
+        return super()._save(name, content)
+
+
+image_storage = ContentAddressedStorage()
@@ -1,8 +1,12 @@
+from io import StringIO
 from unittest.mock import patch
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core.models import Change, Recipe, Tag
+
 
 class CommandTests(TestCase):
 
@@ -20,3 +24,58 @@ class CommandTests(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command('wait_for_db')
             self.assertEqual(gi.call_count, 6)
+
+    def test_explain_queries_rolls_back_dataset(self):
+        """Test that the query plans are printed without keeping data"""
+        out = StringIO()
+        call_command(
+            'explain_queries',
+            recipes=20,
+            tags=5,
+            ingredients=5,
+            stdout=out
+        )
+
+        self.assertIn('With indexes', out.getvalue())
+        self.assertIn('Without indexes', out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_reconcile_recipe_counts(self):
+        """Test that drifted recipe counts are corrected"""
+        user = get_user_model().objects.create_user('seba@wp.pl', 'pass')
+        tag = Tag.objects.create(user=user, name='Vegan')
+        Recipe.objects.create(
+            user=user, title='Salad', time_minutes=5, price=5
+        ).tags.add(tag)
+        Tag.objects.filter(pk=tag.pk).update(recipe_count=7)
+        out = StringIO()
+
+        call_command('reconcile_recipe_counts', stdout=out)
+
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 1)
+        self.assertIn('tags: 1 wrong counts', out.getvalue())
+
+    def test_compact_changes(self):
+        """Test that only the latest entry of each object is kept"""
+        user = get_user_model().objects.create_user('seba@wp.pl', 'pass')
+        tag = Tag.objects.create(user=user, name='Vegan')
+        tag.name = 'Vegetarian'
+        tag.save()
+        Change.objects.filter(kind=Change.TAG).delete()
+        out = StringIO()
+
+        call_command('compact_changes', '--backfill', stdout=out)
+
+        self.assertEqual(
+            list(Change.objects.values_list('kind', 'object_id')),
+            [(Change.TAG, tag.id)]
+        )
+        self.assertIn('tags: 1 logged', out.getvalue())
+
+        tag.save()
+        call_command('compact_changes', stdout=out)
+
+        self.assertEqual(Change.objects.count(), 1)
+        self.assertIn('1 superseded entries deleted', out.getvalue())
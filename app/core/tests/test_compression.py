@@ -0,0 +1,95 @@
+import gzip
+from unittest import mock, skipIf
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+
+from core.middleware import GzipCoding, accepted_codings, brotli
+from core.models import Recipe
+from recipe.tests.utils import AuthenticatedClientMixin
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+EXPORT_URL = reverse('recipe:recipe-export')
+ME_URL = reverse('user:me')
+
+
+class AcceptedCodingsTests(TestCase):
+    """Tests parsing the Accept-Encoding header"""
+
+    def test_qualities(self):
+        """Tests that q=0 and the wildcard are honoured"""
+        self.assertEqual(accepted_codings('gzip;q=0.5, br;q=0'), {'gzip'})
+        self.assertEqual(accepted_codings('identity'), set())
+        self.assertIn('gzip', accepted_codings('*'))
+        self.assertNotIn('gzip', accepted_codings('*, gzip;q=0'))
+
+
+class CompressionMiddlewareTests(AuthenticatedClientMixin, TestCase):
+    """Tests compressing the responses"""
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        for i in range(30):
+            Recipe.objects.create(user=self.user, title=f'Recipe {i}',
+                                  time_minutes=30, price='10.00')
+
+    def test_gzip(self):
+        """Tests that gzip responses decompress to the plain body"""
+        plain = self.client.get(RECIPE_URL)
+
+        res = self.client.get(RECIPE_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res['Vary'])
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertEqual(res['Content-Length'], str(len(res.content)))
+
+    @skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli_is_preferred(self):
+        """Tests that brotli wins when both codings are accepted"""
+        plain = self.client.get(RECIPE_URL)
+
+        res = self.client.get(RECIPE_URL, HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(res.content), plain.content)
+
+    def test_small_responses_are_not_compressed(self):
+        """Tests that responses below the minimum size stay plain"""
+        res = self.client.get(ME_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+    def test_etag_is_weakened(self):
+        """Tests that the weak ETag still revalidates the list"""
+        res = self.client.get(RECIPE_URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(res['ETag'].startswith('W/"'))
+
+        res = self.client.get(RECIPE_URL, HTTP_ACCEPT_ENCODING='gzip',
+                              HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, 304)
+
+    def test_compressed_content_is_reused(self):
+        """Tests that a cached list is not compressed on each hit"""
+        with mock.patch.object(GzipCoding, 'compress',
+                               wraps=GzipCoding().compress) as compress:
+            first = self.client.get(RECIPE_URL, HTTP_ACCEPT_ENCODING='gzip')
+            second = self.client.get(RECIPE_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(first.content, second.content)
+
+    def test_streaming_stays_streaming(self):
+        """Tests that streaming responses are compressed by chunks"""
+        plain = b''.join(self.client.get(EXPORT_URL).streaming_content)
+
+        res = self.client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(res.streaming_content)),
+                         plain)
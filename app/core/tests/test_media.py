@@ -0,0 +1,105 @@
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+
+CONTENT = bytes(range(256)) * 4
+
+
+class MediaServingTests(TestCase):
+    """Tests serving the uploaded files"""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        os.makedirs(os.path.join(media_root.name, 'uploads'))
+        self.path = os.path.join(media_root.name, 'uploads', 'image.jpg')
+        with open(self.path, 'wb') as media_file:
+            media_file.write(CONTENT)
+        self.url = reverse('media', args=['uploads/image.jpg'])
+
+    def test_serves_file_as_immutable(self):
+        """Tests that files are cached for long and never revalidated"""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', res['Cache-Control'])
+
+    def test_serves_byte_range(self):
+        """Tests that a single byte range is answered with 206"""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT[10:20])
+        self.assertEqual(res['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+        self.assertEqual(res['Content-Length'], '10')
+
+    def test_serves_suffix_range(self):
+        """Tests that a range of the last bytes is answered"""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=-100')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT[-100:])
+
+    def test_unsatisfiable_range(self):
+        """Tests that a range past the end of the file is refused"""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_stale_if_range_serves_whole_file(self):
+        """Tests that a range of an older version is not served"""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=10-19',
+                              HTTP_IF_RANGE=http_date(0))
+
+        self.assertEqual(res.status_code, 200)
+
+    def test_not_modified(self):
+        """Tests that an unchanged file is not sent again"""
+        last_modified = self.client.get(self.url)['Last-Modified']
+
+        res = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(res.status_code, 304)
+
+    @override_settings(MEDIA_SENDFILE_BACKEND='x-accel-redirect')
+    def test_x_accel_redirect(self):
+        """Tests that nginx is told to send the file"""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['X-Accel-Redirect'],
+                         '/internal-media/uploads/image.jpg')
+        self.assertEqual(res.content, b'')
+        self.assertIn('immutable', res['Cache-Control'])
+
+    @override_settings(MEDIA_SENDFILE_BACKEND='x-sendfile')
+    def test_x_sendfile(self):
+        """Tests that the web server is given the file path"""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res['X-Sendfile'], self.path)
+        self.assertEqual(res.content, b'')
+
+    def test_path_outside_media_root(self):
+        """Tests that files outside MEDIA_ROOT are never served"""
+        res = self.client.get('/media/../settings.py')
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_missing_file(self):
+        """Tests that a missing file is not found"""
+        res = self.client.get(reverse('media', args=['uploads/missing.jpg']))
+
+        self.assertEqual(res.status_code, 404)
@@ -1,7 +1,12 @@
+import hashlib
+import os
+import tempfile
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
 from core import models
-from unittest.mock import patch
+from core.storage import ContentAddressedStorage
 
 def create_sample_user(email="seba@wp.pl", password="correctpass"):
     """Creating a sample user for tests"""
@@ -67,15 +72,31 @@ class ModelTests(TestCase):
         )
         self.assertEqual(str(recipe), recipe.title)
 
-    @patch('uuid.uuid4')
-    def test_image_file_uuid(self, mock_uuid):
-        """Check that the image is saved in the correct location"""
-        test_uuid = 'unique-uuid'
-        mock_uuid.return_value = test_uuid
-
-        file_path = models.recipe_image_file_path(None, 'myimage.jpg')
-
-        exp_path = f'uploads/recipe/{test_uuid}.jpg'
-
-        self.assertEqual(file_path, exp_path)
+    def test_image_file_path(self):
+        """Check that the image is saved in the recipe uploads location"""
+        file_path = models.recipe_image_file_path(None, 'myimage.JPG')
+
+        self.assertEqual(file_path, 'uploads/recipe/image.jpg')
+
+    def test_image_storage_names_files_by_content(self):
+        """Check that identical content is stored once, under its hash"""
+        content = b'image content'
+        digest = hashlib.sha256(content).hexdigest()
+        with tempfile.TemporaryDirectory() as location:
+            storage = ContentAddressedStorage(location=location)
+
+            first = storage.save('uploads/recipe/image.jpg',
+                                 ContentFile(content))
+            second = storage.save('uploads/recipe/image.jpg',
+                                  ContentFile(content))
+
+            self.assertEqual(first, second)
+            self.assertEqual(
+                first,
+                f'uploads/recipe/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+            )
+            self.assertEqual(
+                os.listdir(os.path.dirname(storage.path(first))),
+                [f'{digest}.jpg']
+            )
 
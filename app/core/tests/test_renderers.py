@@ -0,0 +1,77 @@
+import datetime
+import io
+from collections import OrderedDict
+from decimal import Decimal
+from unittest import skipIf
+
+from django.test import SimpleTestCase, override_settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ParseError
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer, orjson
+
+
+PAYLOAD = OrderedDict([
+    ('next', None),
+    ('results', [{
+        'id': 1,
+        'title': 'Żurek \u2028',
+        'price': Decimal('15.89'),
+        'ratio': 0.75,
+        'updated_at': datetime.datetime(2019, 5, 1, 12, 30, 15, 123456,
+                                        tzinfo=datetime.timezone.utc),
+        'detail': _('Not found.'),
+        'tags': [1, 2],
+    }]),
+])
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Tests the JSON renderer and parser of the API"""
+
+    def render(self, data, media_type=None):
+        return FastJSONRenderer().render(data, media_type)
+
+    @skipIf(orjson is None, 'orjson is not installed')
+    def test_orjson_matches_standard_library(self):
+        """Tests that orjson renders what the json module renders"""
+        with override_settings(API_JSON_BACKEND='json'):
+            expected = self.render(PAYLOAD)
+
+        self.assertEqual(self.render(PAYLOAD), expected)
+
+    def test_decimals_keep_their_value(self):
+        """Tests that decimals are rendered as exact strings"""
+        for backend in ('orjson', 'json'):
+            with override_settings(API_JSON_BACKEND=backend):
+                self.assertEqual(self.render({'price': Decimal('0.10')}),
+                                 b'{"price":"0.10"}')
+
+    def test_escapes_line_separators(self):
+        """Tests that U+2028 and U+2029 are escaped"""
+        self.assertEqual(self.render(['\u2028\u2029']),
+                         b'["\\u2028\\u2029"]')
+
+    def test_indent_falls_back(self):
+        """Tests that an indent is rendered by the json module"""
+        rendered = self.render({'id': 1}, 'application/json; indent=2')
+
+        self.assertEqual(rendered, b'{\n  "id": 1\n}')
+
+    def test_parse(self):
+        """Tests that both backends parse the same data"""
+        for backend in ('orjson', 'json'):
+            with override_settings(API_JSON_BACKEND=backend):
+                data = FastJSONParser().parse(
+                    io.BytesIO('{"title": "Żurek", "price": 1.5}'.encode())
+                )
+                self.assertEqual(data, {'title': 'Żurek', 'price': 1.5})
+
+    def test_parse_errors(self):
+        """Tests that malformed JSON is a ParseError for both backends"""
+        for backend in ('orjson', 'json'):
+            with override_settings(API_JSON_BACKEND=backend):
+                for body in (b'{"title": ', b'[NaN]'):
+                    with self.assertRaises(ParseError):
+                        FastJSONParser().parse(io.BytesIO(body))
@@ -0,0 +1,31 @@
+from django.db import connections, router
+
+
+def bulk_create(model, objs, batch_size=1000, **kwargs):
+    """Inserts objs in batches the database backend can handle"""
+    objs = list(objs)
+    if not objs:
+        return objs
+    connection = connections[router.db_for_write(model)]
+    fields = [field for field in model._meta.concrete_fields
+              if not field.primary_key]
+    batch_size = min(
+        batch_size,
+        max(connection.ops.bulk_batch_size(fields, objs), 1)
+    )
+    return model.objects.bulk_create(objs, batch_size=batch_size, **kwargs)
+
+
+def bulk_create_with_ids(model, objs, batch_size=1000):
+    """Inserts objs making sure each one gets its primary key set.
+
+    Backends that cannot return ids from a bulk insert fall back to
+    saving the objects one by one.
+    """
+    objs = list(objs)
+    connection = connections[router.db_for_write(model)]
+    if connection.features.can_return_ids_from_bulk_insert:
+        return bulk_create(model, objs, batch_size)
+    for obj in objs:
+        obj.save(force_insert=True)
+    return objs
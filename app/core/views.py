@@ -0,0 +1,123 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, \
+                        HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _parse_range(header, size):
+    """Returns the (start, end) of a single byte range, None for a
+    header that is ignored and False for an unsatisfiable range"""
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    else:
+        start = max(size - int(end), 0)
+        end = size - 1
+    if start > end:
+        return False
+    return start, end
+
+
+def _iter_range(path, start, length):
+    with open(path, 'rb') as media_file:
+        media_file.seek(start)
+        while length > 0:
+            chunk = media_file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def _offload(path, name):
+    """Returns an empty response telling the web server to send the file
+    itself, or None when no offload is configured"""
+    backend = settings.MEDIA_SENDFILE_BACKEND
+    if backend == 'x-accel-redirect':
+        header, value = 'X-Accel-Redirect', \
+            settings.MEDIA_ACCEL_REDIRECT_LOCATION + name
+    elif backend == 'x-sendfile':
+        header, value = 'X-Sendfile', path
+    else:
+        return None
+    response = HttpResponse()
+    response[header] = value
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Serves an uploaded file.
+
+    Uploaded files are named after their content or a uuid, so they are
+    cached as immutable. With MEDIA_SENDFILE_BACKEND set the bytes are
+    sent by the web server, which also answers range requests. Otherwise
+    a single byte range is answered here.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    stat = os.stat(full_path)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              stat.st_mtime, stat.st_size):
+        return HttpResponseNotModified()
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    response = _offload(full_path, path)
+    if response is None:
+        response = _serve_file(request, full_path, stat)
+    response['Content-Type'] = content_type
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = \
+        f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable'
+    return response
+
+
+def _serve_file(request, full_path, stat):
+    size = stat.st_size
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if 'HTTP_RANGE' in request.META and (
+            if_range is None or
+            parse_http_date_safe(if_range) == int(stat.st_mtime)):
+        byte_range = _parse_range(request.META['HTTP_RANGE'], size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif byte_range is None:
+        response = FileResponse(open(full_path, 'rb'))
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _iter_range(full_path, start, end - start + 1),
+            status=206
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,82 @@
+import bisect
+
+from django.conf import settings
+
+from recipe import cache
+
+
+class PrefixIndex:
+    """Typo tolerant prefix search over the names of one user's tags or
+    ingredients.
+
+    The case folded names are kept sorted, so the completions of a
+    prefix are one contiguous range found by bisection, as in a trie
+    but without a node per character. Typos are handled by looking up
+    every prefix one edit away from the query.
+    """
+
+    def __init__(self, items):
+        entries = sorted((name.casefold(), name, id_) for id_, name in items)
+        self.keys = [key for key, _, _ in entries]
+        self.entries = [(id_, name) for _, name, id_ in entries]
+        self.alphabet = sorted(set(''.join(self.keys)))
+
+    def _completions(self, prefix):
+        """Yields the positions of the names starting with prefix"""
+        position = bisect.bisect_left(self.keys, prefix)
+        while (position < len(self.keys) and
+               self.keys[position].startswith(prefix)):
+            yield position
+            position += 1
+
+    def _edits(self, word):
+        """Returns the words one deletion, transposition, substitution
+        or insertion away, limited to characters of the index"""
+        splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+        edits = set()
+        for left, right in splits:
+            if right:
+                edits.add(left + right[1:])
+            if len(right) > 1:
+                edits.add(left + right[1] + right[0] + right[2:])
+            for char in self.alphabet:
+                if right:
+                    edits.add(left + char + right[1:])
+                edits.add(left + char + right)
+        edits.discard(word)
+        return sorted(edits)
+
+    def search(self, query, limit):
+        """Returns up to `limit` (id, name) pairs, the names starting
+        with the query first, then the ones a typo away"""
+        query = query.casefold()
+        found = []
+        for position in self._completions(query):
+            found.append(position)
+            if len(found) == limit:
+                return [self.entries[position] for position in found]
+
+        if len(query) >= settings.RECIPE_AUTOCOMPLETE_FUZZY_MIN_LENGTH:
+            seen = set(found)
+            fuzzy = set()
+            for edit in self._edits(query):
+                for position in self._completions(edit):
+                    if position in seen:
+                        continue
+                    fuzzy.add(position)
+                    if len(fuzzy) + len(found) == limit:
+                        break
+                if len(fuzzy) + len(found) == limit:
+                    break
+            found.extend(sorted(fuzzy))
+        return [self.entries[position] for position in found]
+
+
+_indexes = cache.LocalIndexCache()
+
+
+def complete_names(model, user_id, scope, query, limit):
+    index = _indexes.get(user_id, scope, lambda: PrefixIndex(
+        model.objects.filter(user_id=user_id).values_list('id', 'name')
+    ))
+    return index.search(query, limit)
@@ -0,0 +1,182 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+
+from core.models import Tag, Ingredient, Recipe, RecipeTag, RecipeIngredient
+from core.utils import bulk_create, bulk_create_with_ids
+from recipe.serializers import RecipeBulkSerializer
+from recipe.signals import recipes_bulk_written, recipe_attrs_bulk_created
+
+
+def get_or_create_by_names(model, user, names):
+    """Returns a name to id mapping of the user's tags or ingredients,
+    creating the missing ones with a single INSERT ... ON CONFLICT.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+    named = model.objects.filter(user=user, name__in=names)
+    existing = dict(named.values_list('name', 'id'))
+    missing = [name for name in names if name not in existing]
+    if not missing:
+        return existing
+
+    bulk_create(
+        model,
+        (model(user=user, name=name) for name in missing),
+        ignore_conflicts=True
+    )
+    ids = dict(named.values_list('name', 'id'))
+    recipe_attrs_bulk_created.send(
+        sender=model,
+        user=user,
+        ids=[ids[name] for name in missing]
+    )
+    return ids
+
+
+def _referenced_ids(items, field):
+    """Collects the integer ids referenced by the items in a field"""
+    ids = set()
+    for item in items:
+        values = item.get(field) if isinstance(item, dict) else None
+        if field == 'id':
+            values = [values]
+        if not isinstance(values, list):
+            continue
+        for value in values:
+            try:
+                ids.add(int(value))
+            except (TypeError, ValueError):
+                pass
+    return ids
+
+
+def validate_recipes(user, items):
+    """Validates a batch of recipe items for the user.
+
+    References to recipes, tags and ingredients are checked with one
+    query per model. A recipe may only be updated once per batch.
+    Raises a ValidationError listing the errors of every item (an empty
+    dict for valid items).
+    """
+    if not isinstance(items, list):
+        raise ValidationError(_('Expected a list of recipes.'))
+    if len(items) > settings.RECIPE_BULK_MAX_ITEMS:
+        raise ValidationError(_('Ensure there are no more than %d recipes.')
+                              % settings.RECIPE_BULK_MAX_ITEMS)
+
+    context = {
+        'recipes': Recipe.objects.filter(
+            user=user,
+            id__in=_referenced_ids(items, 'id')
+        ).in_bulk(),
+        'tag_ids': set(Tag.objects.filter(
+            user=user,
+            id__in=_referenced_ids(items, 'tags')
+        ).values_list('id', flat=True)),
+        'ingredient_ids': set(Ingredient.objects.filter(
+            user=user,
+            id__in=_referenced_ids(items, 'ingredients')
+        ).values_list('id', flat=True)),
+    }
+
+    validated, errors, updated_ids = [], [], set()
+    for item in items:
+        partial = isinstance(item, dict) and 'id' in item
+        serializer = RecipeBulkSerializer(
+            data=item,
+            partial=partial,
+            context=context
+        )
+        if not serializer.is_valid():
+            errors.append(serializer.errors)
+            continue
+        pk = serializer.validated_data.get('id')
+        if pk in updated_ids:
+            errors.append({'id': [_('Duplicate recipe id in the batch.')]})
+            continue
+        if pk is not None:
+            updated_ids.add(pk)
+        validated.append(serializer.validated_data)
+        errors.append({})
+    if any(errors):
+        raise ValidationError({'errors': errors})
+    return validated, context['recipes']
+
+
+def write_recipes(user, validated, existing=None):
+    """Creates or updates the validated recipes in one transaction.
+
+    Returns the recipe ids in the order of the items.
+    """
+    existing = existing or {}
+    recipes, new_recipes, updated_recipes = [], [], []
+    updated_fields = set()
+    for data in validated:
+        fields = {key: value for key, value in data.items()
+                  if key not in ('id', 'tags', 'ingredients')}
+        if 'id' in data:
+            recipe = existing[data['id']]
+            for key, value in fields.items():
+                setattr(recipe, key, value)
+            updated_fields.update(fields)
+            updated_recipes.append(recipe)
+        else:
+            recipe = Recipe(user=user, **fields)
+            new_recipes.append(recipe)
+        recipes.append(recipe)
+
+    with transaction.atomic():
+        bulk_create_with_ids(Recipe, new_recipes)
+        if updated_recipes:
+            now = timezone.now()
+            for recipe in updated_recipes:
+                recipe.updated_at = now
+            Recipe.objects.bulk_update(
+                updated_recipes,
+                sorted(updated_fields | {'updated_at'}),
+                batch_size=1000
+            )
+        tag_ids, ingredient_ids = _write_links(recipes, validated)
+
+        # Inside the transaction, so the counts, search vectors and
+        # sync entries commit with the recipes or not at all
+        recipe_ids = [recipe.id for recipe in recipes]
+        recipes_bulk_written.send(
+            sender=Recipe,
+            user=user,
+            recipe_ids=recipe_ids,
+            tag_ids=tag_ids,
+            ingredient_ids=ingredient_ids
+        )
+    return recipe_ids
+
+
+def _write_links(recipes, validated):
+    """Replaces the given tag and ingredient links of the recipes.
+
+    Returns the ids of the tags and ingredients that were linked or
+    unlinked.
+    """
+    tag_ids, ingredient_ids = set(), set()
+    for through, field, column, touched in (
+            (RecipeTag, 'tags', 'tag_id', tag_ids),
+            (RecipeIngredient, 'ingredients', 'ingredient_id',
+             ingredient_ids)):
+        replaced = [recipe.id for recipe, data in zip(recipes, validated)
+                    if 'id' in data and field in data]
+        if replaced:
+            links = through.objects.filter(recipe_id__in=replaced)
+            touched.update(links.values_list(column, flat=True))
+            links.delete()
+
+        rows = []
+        for recipe, data in zip(recipes, validated):
+            for pk in data.get(field, ()):
+                rows.append(through(recipe_id=recipe.id, **{column: pk}))
+                touched.add(pk)
+        bulk_create(through, rows, ignore_conflicts=True)
+    return tag_ids, ingredient_ids
@@ -0,0 +1,247 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+RECIPES = 'recipes'
+TAGS = 'tags'
+INGREDIENTS = 'ingredients'
+ALL_SCOPES = (RECIPES, TAGS, INGREDIENTS)
+
+ID_LIST_PARAMS = ('tags', 'ingredients')
+FLAG_PARAMS = ('assigned_only',)
+NAME_LIST_PARAMS = ('fields', 'expand')
+
+
+def get_cache():
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def get_version_cache():
+    return caches[settings.RECIPE_VERSION_CACHE_ALIAS]
+
+
+def _version_key(user_id, scope):
+    return f'recipe:version:{user_id}:{scope}'
+
+
+def get_version(user_id, scope):
+    """Returns the current version of a scope of the user's data.
+
+    A missing version starts from the current time, so a version that
+    was evicted never comes back with a value used before.
+    """
+    cache = get_version_cache()
+    key = _version_key(user_id, scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(user_id, scopes):
+    cache = get_version_cache()
+    for scope in scopes or ALL_SCOPES:
+        try:
+            cache.incr(_version_key(user_id, scope))
+        except ValueError:
+            pass
+
+
+def invalidate(user_id, *scopes):
+    """Bumps the versions of the scopes, orphaning their cached entries.
+
+    The versions are bumped right away, for the reads of the writing
+    transaction itself, and again once it commits: a concurrent request
+    may have cached the data as it was before the commit under the
+    version of the first bump.
+    """
+    _bump(user_id, scopes)
+    transaction.on_commit(lambda: _bump(user_id, scopes))
+
+
+def normalize_params(query_params):
+    """Returns the query params in a canonical, hashable form"""
+    normalized = []
+    for name in sorted(query_params):
+        value = query_params.get(name)
+        if name in ID_LIST_PARAMS:
+            try:
+                ids = sorted({int(param) for param in value.split(',')})
+            except ValueError:
+                pass
+            else:
+                value = ','.join(str(id_) for id_ in ids)
+        elif name in FLAG_PARAMS:
+            value = str(bool(value))
+        elif name in NAME_LIST_PARAMS:
+            value = ','.join(sorted(set(value.split(','))))
+        normalized.append((name, value))
+    return urlencode(normalized)
+
+
+def _request_digest(request, *parts):
+    return hashlib.sha1('\n'.join((
+        request.build_absolute_uri(request.path),
+        normalize_params(request.query_params),
+    ) + parts).encode()).hexdigest()
+
+
+def list_cache_key(request, scope):
+    """Returns the cache key of a list response for the request user"""
+    user_id = request.user.id
+    digest = _request_digest(request)
+    version = get_version(user_id, scope)
+    return f'recipe:list:{user_id}:{scope}:{version}:{digest}'
+
+
+def get_etag(request, scope, *parts):
+    """Returns a strong ETag for the representation of the request.
+
+    It only changes with the user's version of the scope, so it can be
+    computed without reading any rows. It is specific to the user and
+    to `parts`, e.g. the pk of a retrieved object, so a tag sent for
+    another user or object never matches.
+    """
+    version = get_version(request.user.id, scope)
+    return '"%s"' % _request_digest(
+        request,
+        str(request.user.id),
+        str(version),
+        request.accepted_media_type or '',
+        *parts
+    )
+
+
+def etag_matches(request, etag, wildcard=True):
+    """Weakly compares the etag with the If-None-Match header.
+
+    `*` matches any representation, so it is only honoured with
+    `wildcard` once the resource is known to exist.
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return (wildcard and '*' in etags) or etag in (
+        tag[2:] if tag.startswith('W/') else tag for tag in etags
+    )
+
+
+class CachedListMixin:
+    """Caches the list response of a viewset per user and query params.
+
+    Entries are never deleted, they are orphaned by `invalidate`
+    whenever the user's data in `cache_scope` changes. They are kept in
+    the RECIPE_CACHE_ALIAS cache, apart from the versions, so that the
+    lists never evict the versions they are keyed on.
+    """
+    cache_scope = None
+
+    def list(self, request, *args, **kwargs):
+        key = list_cache_key(request, self.cache_scope)
+        data = get_cache().get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        get_cache().set(key, response.data, settings.RECIPE_CACHE_TIMEOUT)
+        return response
+
+
+class ConditionalGetMixin:
+    """Answers list and retrieve with 304 Not Modified when the client's
+    ETag still matches, before running any query or serializer.
+    `If-None-Match: *` is answered only once the object is found.
+
+    Retrieved objects also get a Last-Modified header from `updated_at`.
+    """
+    cache_scope = None
+
+    def _not_modified(self, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED,
+                        headers={'ETag': etag})
+
+    def list(self, request, *args, **kwargs):
+        etag = get_etag(request, self.cache_scope)
+        if etag_matches(request, etag):
+            return self._not_modified(etag)
+
+        response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        etag = get_etag(request, self.cache_scope, str(self.kwargs[lookup]))
+        if etag_matches(request, etag, wildcard=False):
+            return self._not_modified(etag)
+
+        instance = self.get_object()
+        if etag_matches(request, etag):
+            return self._not_modified(etag)
+        last_modified = self.get_last_modified(instance)
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        if ('HTTP_IF_NONE_MATCH' not in request.META and
+                if_modified_since is not None and
+                int(last_modified.timestamp()) <= if_modified_since):
+            return self._not_modified(etag)
+
+        serializer = self.get_serializer(instance)
+        response = Response(serializer.data)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def get_last_modified(self, instance):
+        return instance.updated_at
+
+
+class LocalIndexCache:
+    """Keeps indexes built from a user's data in this process.
+
+    An index is kept for the version of the user's scope it was built
+    at, so any write that invalidates the cached lists also rebuilds
+    the index, in every process sharing the versions cache. Indexes are
+    also rebuilt after RECIPE_LOCAL_INDEXES_TIMEOUT seconds, which bounds
+    how stale they get with versions local to another process. The least
+    recently used indexes are dropped beyond RECIPE_LOCAL_INDEXES_MAX.
+    """
+
+    def __init__(self):
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, scope, build):
+        """Returns the index of the user's scope, calling build() to
+        create it when it is missing, outdated or expired"""
+        key = (scope, user_id)
+        version = get_version(user_id, scope)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._indexes.get(key)
+            if (cached is not None and cached[0] == version and
+                    now < cached[1]):
+                self._indexes.move_to_end(key)
+                return cached[2]
+
+        index = build()
+        expires = now + settings.RECIPE_LOCAL_INDEXES_TIMEOUT
+        with self._lock:
+            self._indexes[key] = (version, expires, index)
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > settings.RECIPE_LOCAL_INDEXES_MAX:
+                self._indexes.popitem(last=False)
+        return index
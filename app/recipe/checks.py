@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+# Backends keeping their entries in each process
+LOCAL_CACHE_BACKENDS = (LocMemCache, DummyCache)
+
+
+@register()
+def check_version_cache(app_configs, **kwargs):
+    """Requires a cache shared by all workers for the data versions.
+
+    Other workers would never see the versions bumped by a write, and
+    keep answering with the cached lists and ETags older than it. A
+    local cache is only allowed with RECIPE_VERSION_CACHE_ALLOW_LOCAL.
+    """
+    if settings.RECIPE_VERSION_CACHE_ALLOW_LOCAL:
+        return []
+    alias = settings.RECIPE_VERSION_CACHE_ALIAS
+    if not isinstance(caches[alias], LOCAL_CACHE_BACKENDS):
+        return []
+    return [Error(
+        f'The {alias!r} cache is local to each process.',
+        hint='Set RECIPE_VERSION_CACHE_BACKEND to a cache shared by all '
+             'workers, e.g. memcached.',
+        obj=alias,
+        id='recipe.E001',
+    )]
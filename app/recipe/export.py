@@ -0,0 +1,92 @@
+import csv
+import re
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.models import Recipe
+from recipe.serializers import RecipeExportSerializer
+
+
+CSV_FIELDS = ('id', 'title', 'price', 'time_minutes', 'link',
+              'tags', 'ingredients')
+NAME_SEPARATOR = '|'
+# A name, with the separator and backslash in it escaped by a backslash
+NAME_PATTERN = re.compile(r'(?:\\.|[^\\%s])+' % re.escape(NAME_SEPARATOR),
+                          re.DOTALL)
+ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+
+
+def join_names(names):
+    """Joins the names with NAME_SEPARATOR, escaping it and the
+    backslash in them with a backslash"""
+    return NAME_SEPARATOR.join(
+        name.replace('\\', '\\\\')
+            .replace(NAME_SEPARATOR, '\\' + NAME_SEPARATOR)
+        for name in names
+    )
+
+
+def split_names(value):
+    """Returns the names joined by join_names, skipping empty ones"""
+    return [ESCAPE_PATTERN.sub(r'\1', name)
+            for name in NAME_PATTERN.findall(value)]
+
+
+def iter_recipe_chunks(user, chunk_size=None):
+    """Yields the user's recipes in chunks of serialized dicts.
+
+    Every chunk is read with a keyset query and its own batched
+    prefetch of tags and ingredients, so memory only depends on the
+    chunk size and not on the number of recipes.
+    """
+    chunk_size = chunk_size or settings.RECIPE_EXPORT_CHUNK_SIZE
+    recipes = Recipe.objects.filter(user=user) \
+                            .with_related_objects() \
+                            .order_by('id')
+    last_id = 0
+    while True:
+        chunk = list(recipes.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        yield RecipeExportSerializer(chunk, many=True).data
+        last_id = chunk[-1].id
+
+
+def iter_ndjson(user):
+    """Yields the user's recipes as newline delimited JSON"""
+    encoder = JSONEncoder(ensure_ascii=False)
+    for chunk in iter_recipe_chunks(user):
+        yield ''.join(encoder.encode(recipe) + '\n' for recipe in chunk)
+
+
+class _Echo:
+    """File-like object returning what is written to it"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(user):
+    """Yields the user's recipes as CSV, joining tag and ingredient
+    names with join_names"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_FIELDS)
+    for chunk in iter_recipe_chunks(user):
+        yield ''.join(writer.writerow((
+            recipe['id'],
+            recipe['title'],
+            recipe['price'],
+            recipe['time_minutes'],
+            recipe['link'],
+            join_names(tag['name'] for tag in recipe['tags']),
+            join_names(
+                ingredient['name'] for ingredient in recipe['ingredients']
+            ),
+        )) for recipe in chunk)
+
+
+EXPORT_FORMATS = {
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+    'csv': (iter_csv, 'text/csv'),
+}
@@ -0,0 +1,226 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, features
+
+from core.models import Recipe
+from core.storage import image_storage
+
+
+logger = logging.getLogger(__name__)
+
+IMAGES_DIR = 'uploads/recipe'
+VARIANTS_DIR = 'uploads/recipe/variants'
+FULL = 'full'
+
+_executor = None
+
+# The EXIF Orientation tag and the transposition undoing each value
+ORIENTATION = 0x0112
+ORIENTATION_TRANSPOSES = {
+    2: Image.FLIP_LEFT_RIGHT,
+    3: Image.ROTATE_180,
+    4: Image.FLIP_TOP_BOTTOM,
+    5: Image.TRANSPOSE,
+    6: Image.ROTATE_270,
+    7: Image.TRANSVERSE,
+    8: Image.ROTATE_90,
+}
+
+
+def variant_format():
+    """Returns the Pillow format and file extension of the variants"""
+    if settings.RECIPE_IMAGE_FORMAT == 'WEBP' and features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def variant_names(image_name):
+    """Returns the storage names of the variants of an image"""
+    base = os.path.splitext(os.path.basename(image_name))[0]
+    ext = variant_format()[1]
+    return {
+        variant: os.path.join(VARIANTS_DIR, f'{base}_{variant}.{ext}')
+        for variant in list(settings.RECIPE_IMAGE_VARIANTS) + [FULL]
+    }
+
+
+def _encode(image, size=None):
+    """Re-encodes an image, dropping EXIF and other metadata"""
+    image = image.copy()
+    if size is not None:
+        image.thumbnail((size, size), Image.LANCZOS)
+    image_format, _ = variant_format()
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    content = BytesIO()
+    image.save(content, image_format,
+               quality=settings.RECIPE_IMAGE_QUALITY)
+    return ContentFile(content.getvalue())
+
+
+def apply_orientation(image):
+    """Returns the image turned upright as its EXIF Orientation says.
+
+    The variants drop the EXIF data, the tag included, so it has to be
+    applied to the pixels. Pillow 5.3 has no ImageOps.exif_transpose.
+    """
+    getexif = getattr(image, '_getexif', None)
+    try:
+        exif = getexif() if getexif is not None else None
+    except Exception:
+        # Unreadable EXIF leaves the image as it is stored
+        exif = None
+    transpose = ORIENTATION_TRANSPOSES.get((exif or {}).get(ORIENTATION))
+    if transpose is None:
+        return image
+    return image.transpose(transpose)
+
+
+def read_size(image_file):
+    """Reads the dimensions of an image from its header only"""
+    image_file.seek(0)
+    size = Image.open(image_file).size
+    image_file.seek(0)
+    return size
+
+
+def is_too_large(size):
+    width, height = size
+    return width * height > settings.RECIPE_IMAGE_MAX_PIXELS
+
+
+def create_variants(image_name):
+    """Writes the resized variants of a stored image.
+
+    Images are stored by content, so existing variants are reused.
+    """
+    names = variant_names(image_name)
+    if all(default_storage.exists(name) for name in names.values()):
+        return
+
+    with image_storage.open(image_name) as image_file:
+        image = Image.open(image_file)
+        if is_too_large(image.size):
+            raise ValueError(f'Image of {image.size} is too large')
+        image.load()
+        image = apply_orientation(image)
+
+    sizes = dict(settings.RECIPE_IMAGE_VARIANTS, **{FULL: None})
+    for variant, name in names.items():
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        default_storage.save(name, _encode(image, sizes[variant]))
+
+
+def delete_variants(image_name):
+    for name in variant_names(image_name).values():
+        default_storage.delete(name)
+
+
+def iter_stored_images():
+    """Yields the names of the stored originals, shard by shard.
+
+    Files directly in IMAGES_DIR were uploaded before images were stored
+    by content and come first.
+    """
+    if not image_storage.exists(IMAGES_DIR):
+        return
+    shards, files = image_storage.listdir(IMAGES_DIR)
+    yield [os.path.join(IMAGES_DIR, name) for name in files]
+    for shard in shards:
+        if len(shard) != 2:
+            continue
+        shard_dir = os.path.join(IMAGES_DIR, shard)
+        for subshard in image_storage.listdir(shard_dir)[0]:
+            subshard_dir = os.path.join(shard_dir, subshard)
+            yield [os.path.join(subshard_dir, name)
+                   for name in image_storage.listdir(subshard_dir)[1]]
+
+
+def collect_garbage(min_age=3600, dry_run=False):
+    """Deletes the stored images no recipe references anymore, with
+    their variants.
+
+    Images younger than `min_age` seconds are kept, as they may belong
+    to an upload that is not committed yet. Returns the deleted names.
+    """
+    deadline = time.time() - min_age
+    deleted = []
+    for names in iter_stored_images():
+        referenced = set(Recipe.objects.filter(image__in=names)
+                                       .values_list('image', flat=True))
+        for name in names:
+            if name in referenced:
+                continue
+            modified = image_storage.get_modified_time(name).timestamp()
+            if modified > deadline:
+                continue
+            if not dry_run:
+                delete_variants(name)
+                image_storage.delete(name)
+            deleted.append(name)
+    return deleted
+
+
+def process_recipe_image(recipe_id):
+    """Creates the variants of a recipe image and records the outcome.
+
+    The status is only written if the recipe still has the image that
+    was processed, so a newer upload is never marked as ready.
+    """
+    image_name = Recipe.objects.filter(pk=recipe_id) \
+                               .values_list('image', flat=True).first()
+    if not image_name:
+        return
+    try:
+        create_variants(image_name)
+        image_status = Recipe.IMAGE_READY
+    except Exception:
+        logger.exception('Processing image %s failed', image_name)
+        image_status = Recipe.IMAGE_FAILED
+
+    with transaction.atomic():
+        recipe = Recipe.objects.select_for_update() \
+                               .filter(pk=recipe_id, image=image_name) \
+                               .first()
+        if recipe is not None:
+            recipe.image_status = image_status
+            recipe.save(update_fields=['image_status', 'updated_at'])
+
+
+def _process_in_worker(recipe_id):
+    try:
+        process_recipe_image(recipe_id)
+    finally:
+        connection.close()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.RECIPE_IMAGE_WORKERS,
+            thread_name_prefix='recipe-image'
+        )
+    return _executor
+
+
+def schedule_processing(recipe):
+    """Processes the recipe image in the worker pool once the upload
+    is committed"""
+    if not settings.RECIPE_IMAGE_PROCESS_ASYNC:
+        transaction.on_commit(lambda: process_recipe_image(recipe.id))
+        return
+    transaction.on_commit(
+        lambda: get_executor().submit(_process_in_worker, recipe.id)
+    )
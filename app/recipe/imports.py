@@ -0,0 +1,142 @@
+import csv
+import itertools
+import json
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from core.models import Tag, Ingredient
+from recipe import bulk
+from recipe.export import split_names
+
+
+RECIPE_FIELDS = ('title', 'price', 'time_minutes', 'link')
+
+
+class RecipeImportError(Exception):
+    """Raised for a record that cannot be imported"""
+
+    def __init__(self, record, errors, imported):
+        self.record = record
+        self.errors = errors
+        self.imported = imported
+        super().__init__(f'Record {record}: {errors}')
+
+
+def _names(value):
+    """Returns tag or ingredient names from an export value.
+
+    The value is a string joined by join_names, a list of names or a list of
+    objects with a name. Raises ValueError for anything else.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = split_names(value)
+    if not isinstance(value, list):
+        raise ValueError('Expected a list of names or of objects '
+                         'with a name')
+    names = []
+    for item in value:
+        name = item.get('name') if isinstance(item, dict) else item
+        if not isinstance(name, str) or not 0 < len(name) <= 255:
+            raise ValueError(f'Invalid tag or ingredient name {item!r}')
+        names.append(name)
+    return names
+
+
+def iter_ndjson_records(lines):
+    """Parses newline delimited JSON lines into records"""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            yield {'error': f'Invalid JSON on line {number}: {error}'}
+
+
+def iter_csv_records(lines):
+    """Parses CSV lines with a header row into records"""
+    return csv.DictReader(lines)
+
+
+RECORD_READERS = {
+    'ndjson': iter_ndjson_records,
+    'csv': iter_csv_records,
+}
+
+
+def _validate_chunk(user, records, imported):
+    """Resolves the names of a chunk and validates it as bulk items"""
+    tag_names, ingredient_names, items = [], [], []
+    for position, record in enumerate(records):
+        if not isinstance(record, dict) or 'error' in record:
+            raise RecipeImportError(
+                imported + position + 1,
+                record.get('error') if isinstance(record, dict)
+                else 'Expected an object',
+                imported
+            )
+        item = {key: record[key] for key in RECIPE_FIELDS if key in record}
+        for field in ('tags', 'ingredients'):
+            try:
+                item[field] = _names(record.get(field))
+            except ValueError as error:
+                raise RecipeImportError(
+                    imported + position + 1,
+                    {field: [str(error)]},
+                    imported
+                )
+        tag_names.extend(item['tags'])
+        ingredient_names.extend(item['ingredients'])
+        items.append(item)
+
+    tag_ids = bulk.get_or_create_by_names(Tag, user, tag_names)
+    ingredient_ids = bulk.get_or_create_by_names(
+        Ingredient, user, ingredient_names
+    )
+    for item in items:
+        item['tags'] = [tag_ids[name] for name in item['tags']]
+        item['ingredients'] = [ingredient_ids[name]
+                               for name in item['ingredients']]
+
+    try:
+        return bulk.validate_recipes(user, items)[0]
+    except ValidationError as error:
+        if not isinstance(error.detail, dict):
+            # An error of the whole chunk rather than of its items
+            raise RecipeImportError(imported + 1, error.detail, imported)
+        errors = error.detail['errors']
+        position = next(i for i, item in enumerate(errors) if item)
+        raise RecipeImportError(
+            imported + position + 1,
+            errors[position],
+            imported
+        )
+
+
+def import_records(user, records, skip=0, chunk_size=None, progress=None):
+    """Imports the records chunk by chunk, each in its own transaction.
+
+    The first `skip` records are ignored, which resumes an import that
+    failed after committing that many records. `progress` is called
+    with the total number of committed records after every chunk.
+    Returns that total. Chunks are cut down to RECIPE_BULK_MAX_ITEMS
+    records, the most a bulk write accepts.
+    """
+    chunk_size = min(chunk_size or settings.RECIPE_IMPORT_CHUNK_SIZE,
+                     settings.RECIPE_BULK_MAX_ITEMS)
+    records = itertools.islice(records, skip, None)
+    imported = skip
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return imported
+        with transaction.atomic():
+            validated = _validate_chunk(user, chunk, imported)
+            bulk.write_recipes(user, validated)
+        imported += len(chunk)
+        if progress is not None:
+            progress(imported)
@@ -0,0 +1,128 @@
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, \
+                                       PageNumberPagination, \
+                                       _reverse_ordering
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Keyset pagination over the recipes of a user.
+
+    The cursor only encodes the last seen position, so every page is
+    fetched with an indexed range filter instead of an OFFSET scan.
+    """
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class RecipeAttrCursorPagination(RecipeCursorPagination):
+    """Keyset pagination for tags and ingredients ordered by name, or by
+    the number of recipes using them with `ordering=count`.
+
+    The cursor of the parent only holds the first ordering field, and
+    ties on the count alone would be skipped by an offset, which stops
+    at `offset_cutoff`. So the count ordering keeps the (count, id) pair
+    of the last row in the cursor and continues from it, which is a
+    range scan of the `*_user_count_idx` indexes.
+    """
+    ordering = ('-name', '-id')
+    count_ordering = ('-recipe_count', '-id')
+
+    def _count_ordered(self, request):
+        return request.query_params.get('ordering') == 'count'
+
+    def _decode_count_position(self, position):
+        try:
+            count, pk = (int(value) for value in position.split(':'))
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        return count, pk
+
+    def _filter_from_count_position(self, queryset, position, reverse):
+        count, pk = self._decode_count_position(position)
+        # The range on recipe_count alone is what the index seeks to
+        if reverse:
+            return queryset.filter(
+                Q(recipe_count__gte=count),
+                Q(recipe_count__gt=count) | Q(id__gt=pk)
+            )
+        return queryset.filter(
+            Q(recipe_count__lte=count),
+            Q(recipe_count__lt=count) | Q(id__lt=pk)
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self._count_ordered(request):
+            return super().paginate_queryset(queryset, request, view)
+
+        # Follows the parent, with the two column position filter
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.count_ordering
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = self._filter_from_count_position(
+                queryset, current_position, reverse
+            )
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        has_following_position = len(results) > len(self.page)
+        following_position = None
+        if has_following_position:
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+
+        has_current_position = current_position is not None or offset > 0
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = has_current_position
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = has_current_position
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        if self._count_ordered(request):
+            return self.count_ordering
+        return super().get_ordering(request, queryset, view)
+
+    def _get_position_from_instance(self, instance, ordering):
+        if ordering != self.count_ordering:
+            return super()._get_position_from_instance(instance, ordering)
+        if isinstance(instance, dict):
+            return f"{instance['recipe_count']}:{instance['id']}"
+        return f'{instance.recipe_count}:{instance.id}'
+
+
+class RecipeSearchPagination(PageNumberPagination):
+    """Page numbers for search results, which are ordered by rank and so
+    have no stable key to continue from"""
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
@@ -0,0 +1,67 @@
+import heapq
+from array import array
+from collections import Counter, defaultdict
+from itertools import chain
+
+from core.models import RecipeIngredient
+from recipe import cache
+
+
+class PantryIndex:
+    """Inverted index from ingredients to the recipes of one user.
+
+    Matching a pantry only reads the posting lists of its ingredients,
+    so it costs the number of links of those ingredients and not the
+    number of recipes.
+    """
+
+    def __init__(self, links):
+        postings = defaultdict(lambda: array('q'))
+        sizes = Counter()
+        for recipe_id, ingredient_id in links:
+            postings[ingredient_id].append(recipe_id)
+            sizes[recipe_id] += 1
+        self.postings = dict(postings)
+        self.sizes = dict(sizes)
+        self.by_size = defaultdict(list)
+        for recipe_id, size in self.sizes.items():
+            self.by_size[size].append(recipe_id)
+
+    def match(self, pantry, max_missing, limit):
+        """Returns the number of recipes missing at most max_missing
+        ingredients, and (recipe id, coverage, missing count) of the
+        `limit` best covered ones.
+
+        Recipes without ingredients are never matched.
+        """
+        hits = Counter(chain.from_iterable(
+            self.postings.get(ingredient_id, ()) for ingredient_id in pantry
+        ))
+        # Small recipes can qualify without sharing any ingredient
+        for size in range(1, max_missing + 1):
+            for recipe_id in self.by_size.get(size, ()):
+                hits.setdefault(recipe_id, 0)
+
+        matches = []
+        for recipe_id, count in hits.items():
+            size = self.sizes[recipe_id]
+            missing = size - count
+            if missing <= max_missing:
+                matches.append((recipe_id, count / size, missing))
+        best = heapq.nsmallest(
+            limit,
+            matches,
+            key=lambda match: (-match[1], match[2], -match[0])
+        )
+        return len(matches), best
+
+
+_indexes = cache.LocalIndexCache()
+
+
+def match_pantry(user_id, pantry, max_missing, limit):
+    links = RecipeIngredient.objects.filter(recipe__user_id=user_id) \
+                                    .values_list('recipe_id', 'ingredient_id')
+    index = _indexes.get(user_id, cache.RECIPES,
+                         lambda: PantryIndex(links.iterator()))
+    return index.match(set(pantry), max_missing, limit)
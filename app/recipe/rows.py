@@ -0,0 +1,153 @@
+from collections import defaultdict
+
+from django.db.models import IntegerField, Value
+from rest_framework import serializers
+from rest_framework.response import Response
+
+
+# Fields representing a column value as the value itself
+PLAIN_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.ReadOnlyField,
+)
+
+
+class RowSerializer:
+    """Read only counterpart of a bound ModelSerializer building its
+    output straight from values() rows.
+
+    The fields of `serializer`, after any field selection, decide the
+    output. Columns are copied, or converted by their field when they
+    are not plain values. The ids of every many to many field come
+    from one query over all the link tables, and each nested relation
+    from one query joining its link table, instead of a field call per
+    value of every model instance.
+    """
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        field_sources = getattr(serializer, 'field_sources', {})
+        # Cursor pagination reads the position from the id
+        self.columns = ['id']
+        self.plan = []
+        self.related_ids = {}
+        self.nested = {}
+        for name, field in serializer.fields.items():
+            if isinstance(field, serializers.ManyRelatedField):
+                self.related_ids[name] = self.model._meta.get_field(
+                    field.source
+                )
+                self.plan.append((name, self._related_getter(name)))
+            elif isinstance(field, serializers.ListSerializer):
+                self.nested[name] = (
+                    self.model._meta.get_field(field.source),
+                    RowSerializer(field.child)
+                )
+                self.plan.append((name, self._related_getter(name)))
+            elif hasattr(field, 'to_row_representation'):
+                self._add_columns(*field_sources.get(name, (name,)))
+                self.plan.append((name, self._row_getter(field)))
+            else:
+                self._add_columns(field.source)
+                self.plan.append((name, self._column_getter(field)))
+
+    def _add_columns(self, *columns):
+        for column in columns:
+            if column not in self.columns:
+                self.columns.append(column)
+
+    def _related_getter(self, name):
+        return lambda row, related: related[name].get(row['id'], [])
+
+    def _row_getter(self, field):
+        return lambda row, related: field.to_row_representation(row)
+
+    def _column_getter(self, field):
+        column = field.source
+        if type(field) in PLAIN_FIELDS:
+            return lambda row, related: row[column]
+
+        def convert(row, related):
+            value = row[column]
+            return None if value is None else field.to_representation(value)
+        return convert
+
+    def _link_ids(self, ids):
+        """Returns the related ids of the rows by relation name, from one
+        query over the link tables of all many to many fields"""
+        related = {name: defaultdict(list) for name in self.related_ids}
+        if not self.related_ids:
+            return related
+        names = list(self.related_ids)
+        links = []
+        for index, name in enumerate(names):
+            m2m = self.related_ids[name]
+            links.append(
+                m2m.remote_field.through.objects.filter(**{
+                    f'{m2m.m2m_field_name()}_id__in': ids
+                }).annotate(
+                    relation=Value(index, output_field=IntegerField())
+                ).values_list(
+                    'relation',
+                    f'{m2m.m2m_field_name()}_id',
+                    f'{m2m.m2m_reverse_field_name()}_id'
+                )
+            )
+        for index, row_id, related_id in \
+                links[0].union(*links[1:], all=True):
+            related[names[index]][row_id].append(related_id)
+        for ids_by_row in related.values():
+            for related_ids in ids_by_row.values():
+                related_ids.sort()
+        return related
+
+    def _nested_rows(self, name, ids):
+        """Returns the nested representations of a relation by row id"""
+        m2m, rows = self.nested[name]
+        source = f'{m2m.m2m_field_name()}_id'
+        target = m2m.m2m_reverse_field_name()
+        links = m2m.remote_field.through.objects.filter(**{
+            f'{source}__in': ids
+        }).order_by(f'{target}_id').values_list(
+            source,
+            *(f'{target}__{column}' for column in rows.columns)
+        )
+        row_ids = []
+        related_rows = []
+        for row_id, *values in links:
+            row_ids.append(row_id)
+            related_rows.append(dict(zip(rows.columns, values)))
+        nested = defaultdict(list)
+        for row_id, item in zip(row_ids,
+                                rows.to_representation(related_rows)):
+            nested[row_id].append(item)
+        return nested
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        ids = [row['id'] for row in rows]
+        related = self._link_ids(ids) if ids else {}
+        for name in self.nested:
+            related[name] = self._nested_rows(name, ids) if ids else {}
+        return [
+            {name: get(row, related) for name, get in self.plan}
+            for row in rows
+        ]
+
+
+class RowListMixin:
+    """Lists the values() rows of the queryset with a RowSerializer of
+    the serializer of the view, skipping model instances altogether"""
+
+    def list(self, request, *args, **kwargs):
+        rows = RowSerializer(self.get_serializer())
+        queryset = self.filter_queryset(self.get_queryset()) \
+                       .prefetch_related(None) \
+                       .values(*rows.columns)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(rows.to_representation(page))
+        return Response(rows.to_representation(queryset))
@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, \
+                                           SearchVector
+from django.db import connection
+from django.db.models import Case, F, FloatField, OuterRef, Q, Subquery, \
+                             TextField, Value, When
+from django.utils.module_loading import import_string
+
+from core.models import Recipe, RecipeTag, RecipeIngredient
+
+
+class PostgresSearchEngine:
+    """Full-text search over the maintained Recipe.search_vector.
+
+    Titles weigh most, then tag names, then ingredient names, and the
+    results are ordered by ts_rank.
+    """
+    maintained = True
+
+    def _linked_names(self, through, column):
+        # Imported here as it needs psycopg2, which the fallback
+        # databases do without
+        from django.contrib.postgres.aggregates import StringAgg
+
+        return Subquery(
+            through.objects.filter(recipe_id=OuterRef('pk'))
+                           .values('recipe_id')
+                           .annotate(names=StringAgg(f'{column}__name', ' '))
+                           .values('names'),
+            output_field=TextField()
+        )
+
+    def update(self, recipe_ids):
+        """Recomputes the search vectors of the recipes in one UPDATE"""
+        config = settings.RECIPE_SEARCH_CONFIG
+        Recipe.objects.filter(id__in=recipe_ids).update(search_vector=(
+            SearchVector('title', weight='A', config=config) +
+            SearchVector(self._linked_names(RecipeTag, 'tag'),
+                         weight='B', config=config) +
+            SearchVector(self._linked_names(RecipeIngredient, 'ingredient'),
+                         weight='C', config=config)
+        ))
+
+    def search(self, queryset, terms):
+        query = SearchQuery(terms, config=settings.RECIPE_SEARCH_CONFIG)
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+
+
+class SimpleSearchEngine:
+    """Search for databases without full-text search, e.g. SQLite.
+
+    Every word has to appear in the title, a tag name or an ingredient
+    name. The rank sums the default PostgreSQL weights of the places a
+    word appears in. Nothing is maintained, so `update` does nothing.
+    """
+    maintained = False
+    TITLE_WEIGHT = 1.0
+    TAG_WEIGHT = 0.4
+    INGREDIENT_WEIGHT = 0.2
+
+    def update(self, recipe_ids):
+        pass
+
+    def _weight(self, condition, weight):
+        return Case(
+            When(condition, then=Value(weight)),
+            default=Value(0.0),
+            output_field=FloatField()
+        )
+
+    def search(self, queryset, terms):
+        rank = Value(0.0, output_field=FloatField())
+        for term in terms.split():
+            in_title = Q(title__icontains=term)
+            in_tags = Q(id__in=RecipeTag.objects.filter(
+                tag__name__icontains=term
+            ).values('recipe_id'))
+            in_ingredients = Q(id__in=RecipeIngredient.objects.filter(
+                ingredient__name__icontains=term
+            ).values('recipe_id'))
+            queryset = queryset.filter(in_title | in_tags | in_ingredients)
+            rank = rank + \
+                self._weight(in_title, self.TITLE_WEIGHT) + \
+                self._weight(in_tags, self.TAG_WEIGHT) + \
+                self._weight(in_ingredients, self.INGREDIENT_WEIGHT)
+        return queryset.annotate(search_rank=rank)
+
+
+def get_engine():
+    """Returns the configured search engine, by default the one matching
+    the database"""
+    if settings.RECIPE_SEARCH_ENGINE:
+        return import_string(settings.RECIPE_SEARCH_ENGINE)()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchEngine()
+    return SimpleSearchEngine()
+
+
+def update_search_vectors(recipe_ids):
+    get_engine().update(recipe_ids)
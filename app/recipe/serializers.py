@@ -1,26 +1,134 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from core.models import Tag, Ingredient, Recipe
-
-
-class TagSerializer(serializers.ModelSerializer):
+from recipe.images import is_too_large, read_size, variant_names
+
+
+class RecipeAttrSerializer(serializers.ModelSerializer):
+    """Base serializer for the named objects owned by a user"""
+
+    def validate_name(self, value):
+        request = self.context.get('request')
+        if request is None:
+            return value
+        duplicates = self.Meta.model.objects.filter(
+            user=request.user,
+            name=value
+        )
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError(
+                f'{self.Meta.model.__name__} with this name already exists.'
+            )
+        return value
+
+
+class TagSerializer(RecipeAttrSerializer):
     """Serializer for Tag objects"""
 
     class Meta:
         model = Tag
-        fields = ('id', 'name')
-        read_only_fields = ('id',)
+        fields = ('id', 'name', 'recipe_count')
+        read_only_fields = ('id', 'recipe_count')
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(RecipeAttrSerializer):
     """Serializer for the Ingredient objects"""
 
     class Meta:
         model = Ingredient
-        fields = ('id', 'name')
-        read_only_fields = ('id',)
+        fields = ('id', 'name', 'recipe_count')
+        read_only_fields = ('id', 'recipe_count')
+
 
+class NameListSerializer(serializers.Serializer):
+    """Serializer for a list of tag or ingredient names"""
 
-class RecipeSerializer(serializers.ModelSerializer):
+    names = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        max_length=settings.RECIPE_BULK_MAX_ITEMS
+    )
+
+
+class ImageVariantsField(serializers.Field):
+    """Read only URLs of the variants of a processed recipe image"""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        return self.variant_urls(obj.image.name if obj.image else '',
+                                 obj.image_status)
+
+    def to_row_representation(self, row):
+        """Returns the URLs from a values() row of the recipe"""
+        return self.variant_urls(row['image'], row['image_status'])
+
+    def variant_urls(self, image_name, image_status):
+        if image_status != Recipe.IMAGE_READY or not image_name:
+            return None
+        request = self.context.get('request')
+        urls = {}
+        for variant, name in variant_names(image_name).items():
+            url = default_storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[variant] = url
+        return urls
+
+
+class SelectableFieldsMixin:
+    """Serializes only the field names in the `fields` context entry,
+    nesting the relations named in the `expand` entry.
+
+    `expandable_fields` maps the relations to their nested serializers
+    and `field_sources` maps the fields that are not columns of their
+    own to the columns they read, so views can load only those.
+    """
+    expandable_fields = {}
+    field_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.context.get('expand', ()):
+            self.fields[name] = self.expandable_fields[name](many=True,
+                                                             read_only=True)
+        selected = self.context.get('fields')
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+    @classmethod
+    def check_selection(cls, fields, expand):
+        """Raises a ValidationError for the unknown field names"""
+        errors = {}
+        if fields is not None:
+            unknown = set(fields) - set(cls().fields)
+            if unknown:
+                errors['fields'] = [_('Unknown fields: %s')
+                                    % ', '.join(sorted(unknown))]
+        unknown = set(expand) - set(cls.expandable_fields)
+        if unknown:
+            errors['expand'] = [_('Unknown relations: %s')
+                                % ', '.join(sorted(unknown))]
+        if errors:
+            raise serializers.ValidationError(errors)
+
+    @classmethod
+    def get_columns(cls, fields):
+        """Returns the model columns read by the fields"""
+        columns = set()
+        for name in fields:
+            columns.update(cls.field_sources.get(name, (name,)))
+        return columns
+
+
+class RecipeSerializer(SelectableFieldsMixin, serializers.ModelSerializer):
     """Serializer for the Recipe model"""
 
     ingredients = serializers.PrimaryKeyRelatedField(
@@ -33,10 +141,20 @@ class RecipeSerializer(serializers.ModelSerializer):
         queryset=Tag.objects.all()
     )
 
+    image_variants = ImageVariantsField()
+
+    expandable_fields = {
+        'ingredients': IngredientSerializer,
+        'tags': TagSerializer,
+    }
+    field_sources = {
+        'image_variants': ('image', 'image_status'),
+    }
+
     class Meta:
         model = Recipe
         fields = ('id', 'title', 'price',
-                  'time_minutes', 'ingredients', 'tags' )
+                  'time_minutes', 'ingredients', 'tags', 'image_variants')
         read_only_fields = ('id',)
 
 
@@ -46,10 +164,82 @@ class RecipeDetailSerializer(RecipeSerializer):
     ingredients = IngredientSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
 
+
+class PantryMatchSerializer(RecipeSerializer):
+    """Serializer for a recipe matched against the ingredients at hand"""
+
+    coverage = serializers.FloatField(read_only=True)
+    missing = serializers.ListField(
+        child=serializers.IntegerField(),
+        read_only=True
+    )
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('coverage', 'missing')
+
+
+class RecipeExportSerializer(RecipeDetailSerializer):
+    """Serializer for the Recipe in a full export of the recipe book"""
+
+    class Meta(RecipeDetailSerializer.Meta):
+        fields = RecipeDetailSerializer.Meta.fields + ('link',)
+
+
+class RecipeBulkSerializer(serializers.ModelSerializer):
+    """Serializer for one item of a bulk recipe write.
+
+    Expects the ids the user may reference in the context, so a whole
+    batch is validated without a query per item.
+    """
+
+    id = serializers.IntegerField(required=False)
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+    tags = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+
+    class Meta:
+        model = Recipe
+        fields = ('id', 'title', 'price', 'time_minutes',
+                  'link', 'ingredients', 'tags')
+
+    def _validate_known(self, value, known_ids):
+        unknown = [pk for pk in value if pk not in known_ids]
+        if unknown:
+            raise serializers.ValidationError(
+                f'Invalid pk "{unknown[0]}" - object does not exist.'
+            )
+        return list(dict.fromkeys(value))
+
+    def validate_id(self, value):
+        self._validate_known([value], self.context['recipes'])
+        return value
+
+    def validate_ingredients(self, value):
+        return self._validate_known(value, self.context['ingredient_ids'])
+
+    def validate_tags(self, value):
+        return self._validate_known(value, self.context['tag_ids'])
+
+
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading the images to Recipe API"""
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
-        read_only_fields = ('id',)
+        fields = ('id', 'image', 'image_status', 'image_variants')
+        read_only_fields = ('id', 'image_status')
+
+    def validate_image(self, value):
+        """Rejects images too large to process without decoding them"""
+        if value is not None and is_too_large(read_size(value)):
+            raise serializers.ValidationError(
+                _('Ensure the image has at most %d pixels.')
+                % settings.RECIPE_IMAGE_MAX_PIXELS
+            )
+        return value
@@ -0,0 +1,270 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete, pre_delete, \
+                                     m2m_changed
+from django.dispatch import receiver, Signal
+
+from core.models import Change, Tag, Ingredient, Recipe
+from recipe import cache, search, sync
+
+
+# Sent after recipes and their links were written in bulk, bypassing
+# the model and m2m signals, within the transaction of the write.
+recipes_bulk_written = Signal(
+    providing_args=['user', 'recipe_ids', 'tag_ids', 'ingredient_ids']
+)
+# Sent with the ids of the tags or ingredients created in bulk.
+recipe_attrs_bulk_created = Signal(providing_args=['user', 'ids'])
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_new_user(sender, instance, created, **kwargs):
+    """Makes sure a new user never sees entries cached for a reused id"""
+    if created:
+        cache.invalidate(instance.id)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    cache.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag(sender, instance, **kwargs):
+    cache.invalidate(instance.user_id, cache.TAGS, cache.RECIPES)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient(sender, instance, **kwargs):
+    cache.invalidate(instance.user_id, cache.INGREDIENTS, cache.RECIPES)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        cache.invalidate(instance.user_id, cache.RECIPES, cache.TAGS)
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_recipe_ingredients(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        cache.invalidate(instance.user_id, cache.RECIPES, cache.INGREDIENTS)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_relinked_recipes(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """Keeps Recipe.updated_at current when its links change"""
+    if not reverse:
+        if action.startswith('post_'):
+            Recipe.objects.filter(pk=instance.pk).touch()
+    elif action in ('post_add', 'post_remove'):
+        Recipe.objects.filter(pk__in=pk_set).touch()
+    elif action == 'pre_clear':
+        instance.recipe_set.touch()
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def touch_unlinked_recipes(sender, instance, **kwargs):
+    """Marks the recipes losing a deleted tag or ingredient as modified"""
+    instance.recipe_set.touch()
+
+
+@receiver(recipes_bulk_written)
+def invalidate_bulk_written(sender, user, **kwargs):
+    cache.invalidate(user.id)
+
+
+@receiver(recipe_attrs_bulk_created, sender=Tag)
+def invalidate_bulk_created_tags(sender, user, **kwargs):
+    cache.invalidate(user.id, cache.TAGS)
+
+
+@receiver(recipe_attrs_bulk_created, sender=Ingredient)
+def invalidate_bulk_created_ingredients(sender, user, **kwargs):
+    cache.invalidate(user.id, cache.INGREDIENTS)
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, update_fields, **kwargs):
+    if update_fields is None or 'title' in update_fields:
+        search.update_search_vectors([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def index_relinked_recipes(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """Keeps the search vectors current when the links change"""
+    if not reverse:
+        if action.startswith('post_'):
+            search.update_search_vectors([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        search.update_search_vectors(pk_set)
+    elif action == 'pre_clear' and search.get_engine().maintained:
+        instance._unlinked_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+    elif action == 'post_clear':
+        search.update_search_vectors(
+            instance.__dict__.pop('_unlinked_recipe_ids', [])
+        )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def index_renamed_recipes(sender, instance, created, **kwargs):
+    if not created:
+        search.update_search_vectors(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def collect_unlinked_recipes(sender, instance, **kwargs):
+    if search.get_engine().maintained:
+        instance._unlinked_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def index_unlinked_recipes(sender, instance, **kwargs):
+    search.update_search_vectors(
+        instance.__dict__.pop('_unlinked_recipe_ids', [])
+    )
+
+
+@receiver(recipes_bulk_written)
+def index_bulk_written(sender, recipe_ids, **kwargs):
+    search.update_search_vectors(recipe_ids)
+
+
+def _linked_ids(through, model, recipe_ids):
+    """Returns the ids of the tags or ingredients linked to recipes"""
+    column = f'{model._meta.model_name}_id'
+    return list(through.objects.filter(recipe_id__in=recipe_ids)
+                               .values_list(column, flat=True)
+                               .distinct())
+
+
+def _recount(user_id, model, ids):
+    """Recounts the recipes of the tags or ingredients, which are then
+    changed for the sync as well"""
+    model.objects.filter(pk__in=ids).update_recipe_counts()
+    sync.record_changes(user_id, {model: ids})
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def count_relinked_recipes(sender, instance, action, reverse, model, pk_set,
+                           **kwargs):
+    """Keeps recipe_count of the tags and ingredients current"""
+    if reverse:
+        if action.startswith('post_'):
+            _recount(instance.user_id, type(instance), [instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        _recount(instance.user_id, model, pk_set)
+    elif action == 'pre_clear':
+        instance.__dict__.setdefault('_cleared_ids', {})[sender] = \
+            _linked_ids(sender, model, [instance.pk])
+    elif action == 'post_clear':
+        cleared = instance.__dict__.get('_cleared_ids', {}).pop(sender, [])
+        _recount(instance.user_id, model, cleared)
+
+
+@receiver(pre_delete, sender=Recipe)
+def collect_recipe_links(sender, instance, **kwargs):
+    instance._linked_ids = (
+        _linked_ids(Recipe.tags.through, Tag, [instance.pk]),
+        _linked_ids(Recipe.ingredients.through, Ingredient, [instance.pk]),
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def count_deleted_recipe_links(sender, instance, **kwargs):
+    tag_ids, ingredient_ids = instance.__dict__.pop('_linked_ids', ([], []))
+    _recount(instance.user_id, Tag, tag_ids)
+    _recount(instance.user_id, Ingredient, ingredient_ids)
+
+
+@receiver(recipes_bulk_written)
+def count_bulk_written_links(sender, user, tag_ids, ingredient_ids,
+                             **kwargs):
+    _recount(user.id, Tag, tag_ids)
+    _recount(user.id, Ingredient, ingredient_ids)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def log_saved(sender, instance, **kwargs):
+    sync.record_changes(instance.user_id, {sender: [instance.pk]})
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def log_deleted(sender, instance, **kwargs):
+    sync.record_changes(instance.user_id, {sender: [instance.pk]},
+                        deleted=True)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def log_relinked_recipes(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Logs the recipes whose tags or ingredients changed"""
+    if not reverse:
+        if action.startswith('post_'):
+            sync.record_changes(instance.user_id, {Recipe: [instance.pk]})
+    elif action in ('post_add', 'post_remove'):
+        sync.record_changes(instance.user_id, {Recipe: pk_set})
+    elif action == 'pre_clear':
+        instance._relinked_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+    elif action == 'post_clear':
+        sync.record_changes(instance.user_id, {
+            Recipe: instance.__dict__.pop('_relinked_recipe_ids', [])
+        })
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def collect_relinked_recipes(sender, instance, **kwargs):
+    instance._relinked_recipe_ids = list(
+        instance.recipe_set.values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def log_unlinked_recipes(sender, instance, **kwargs):
+    """Logs the recipes losing a deleted tag or ingredient"""
+    sync.record_changes(instance.user_id, {
+        Recipe: instance.__dict__.pop('_relinked_recipe_ids', [])
+    })
+
+
+@receiver(recipes_bulk_written)
+def log_bulk_written(sender, user, recipe_ids, **kwargs):
+    sync.record_changes(user.id, {Recipe: recipe_ids})
+
+
+@receiver(recipe_attrs_bulk_created)
+def log_bulk_created(sender, user, ids, **kwargs):
+    sync.record_changes(user.id, {sender: ids})
+
+
+@receiver(post_delete, sender=get_user_model())
+def delete_user_changes(sender, instance, **kwargs):
+    """Drops the entries logged while the objects of a deleted user were
+    deleted along with it, the foreign key is checked on commit"""
+    Change.objects.filter(user_id=instance.pk).delete()
@@ -0,0 +1,84 @@
+from collections import OrderedDict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from core.models import Change, Tag, Ingredient, Recipe
+from core.utils import bulk_create
+from recipe import serializers
+from recipe.rows import RowSerializer
+
+
+# Kinds of changes with their key in the sync payload, their model and
+# the serializer of their list endpoint
+SYNCED_KINDS = OrderedDict([
+    (Change.RECIPE, ('recipes', Recipe, serializers.RecipeSerializer)),
+    (Change.TAG, ('tags', Tag, serializers.TagSerializer)),
+    (Change.INGREDIENT,
+     ('ingredients', Ingredient, serializers.IngredientSerializer)),
+])
+
+
+def record_changes(user_id, changes, deleted=False):
+    """Appends entries for the changed objects to the user's log.
+
+    `changes` maps the models to the ids of their changed objects. The
+    row of the user stays locked until the transaction commits, so no
+    writer can commit a lower id after a sync has read a higher one.
+    """
+    entries = [
+        Change(user_id=user_id, kind=model._meta.model_name,
+               object_id=object_id, deleted=deleted)
+        for model, ids in changes.items()
+        for object_id in dict.fromkeys(ids)
+    ]
+    if not entries:
+        return
+    with transaction.atomic(savepoint=False):
+        list(get_user_model().objects.select_for_update()
+                                     .filter(pk=user_id)
+                                     .values_list('pk', flat=True))
+        bulk_create(Change, entries)
+
+
+def changes_since(user, token, limit, context):
+    """Returns the page of the user's changes after the token.
+
+    Created and updated objects are listed as their list endpoints
+    represent them now, deleted ones by id. The returned token is the
+    one to continue from, and `has_more` is set when more changes
+    follow it.
+    """
+    entries = Change.objects.filter(user=user, id__gt=token) \
+                            .order_by('id') \
+                            .values_list('id', 'kind', 'object_id', 'deleted')
+    entries = list(entries[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    # Later entries of an object supersede the earlier ones
+    latest = {(kind, object_id): deleted
+              for _, kind, object_id, deleted in entries}
+
+    data = OrderedDict([
+        ('token', str(entries[-1][0] if entries else token)),
+        ('has_more', has_more),
+    ])
+    deleted_ids = OrderedDict()
+    for kind, (name, model, serializer_class) in SYNCED_KINDS.items():
+        changed = sorted(object_id
+                         for (entry_kind, object_id), deleted in latest.items()
+                         if entry_kind == kind and not deleted)
+        data[name] = []
+        if changed:
+            rows = RowSerializer(serializer_class(context=context))
+            data[name] = rows.to_representation(
+                model.objects.filter(user=user, id__in=changed)
+                             .order_by('id')
+                             .values(*rows.columns)
+            )
+        deleted_ids[name] = sorted(
+            object_id for (entry_kind, object_id), deleted in latest.items()
+            if entry_kind == kind and deleted
+        )
+    data['deleted'] = deleted_ids
+    return data
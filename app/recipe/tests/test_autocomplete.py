@@ -0,0 +1,106 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.models import Tag, Ingredient
+from recipe.autocomplete import PrefixIndex
+from recipe.tests.utils import AuthenticatedClientMixin, create_sample_user
+
+
+TAG_AUTOCOMPLETE_URL = reverse('recipe:tag-autocomplete')
+INGREDIENT_AUTOCOMPLETE_URL = reverse('recipe:ingredient-autocomplete')
+
+
+class PrefixIndexTests(TestCase):
+    """Tests the in-process prefix index"""
+
+    def setUp(self):
+        self.index = PrefixIndex(enumerate(
+            ['Tomato', 'tomatillo', 'Tofu', 'Potato', 'Thyme', 'Toast']
+        ))
+
+    def names(self, query, limit=10):
+        return [name for _, name in self.index.search(query, limit)]
+
+    def test_prefix_matches_ignore_case(self):
+        """Tests that prefixes match regardless of case"""
+        self.assertEqual(self.names('TOMAT'), ['tomatillo', 'Tomato'])
+
+    def test_typos_come_after_prefix_matches(self):
+        """Tests that names one edit away follow the exact prefixes"""
+        self.assertEqual(self.names('toma'),
+                         ['tomatillo', 'Tomato', 'Toast'])
+        self.assertEqual(self.names('tmato'), ['Tomato'])
+        self.assertEqual(self.names('otato'), ['Potato'])
+
+    def test_short_queries_are_not_fuzzy(self):
+        """Tests that short queries only match prefixes"""
+        self.assertEqual(self.names('tf'), [])
+
+    def test_limit(self):
+        """Tests that at most limit names are returned"""
+        self.assertEqual(self.names('to', limit=2), ['Toast', 'Tofu'])
+
+
+class AutocompleteApiTests(AuthenticatedClientMixin, TestCase):
+    """Tests the autocomplete endpoints of tags and ingredients"""
+
+    def test_autocomplete_tags(self):
+        """Tests that tags are completed with their ids"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Dessert')
+
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {'q': 'veg'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'id': tag.id, 'name': 'Vegan'}])
+
+    def test_autocomplete_tolerates_typo(self):
+        """Tests that a misspelled query still finds the ingredient"""
+        ingredient = Ingredient.objects.create(user=self.user, name='Tomato')
+
+        res = self.client.get(INGREDIENT_AUTOCOMPLETE_URL, {'q': 'tomtao'})
+
+        self.assertEqual(res.data, [{'id': ingredient.id, 'name': 'Tomato'}])
+
+    def test_autocomplete_is_limited_to_user(self):
+        """Tests that other users' names are never suggested"""
+        user2 = create_sample_user('waldek@wp.pl')
+        Tag.objects.create(user=user2, name='Vegan')
+
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {'q': 'veg'})
+
+        self.assertEqual(res.data, [])
+
+    def test_warm_index_runs_no_queries(self):
+        """Tests that repeated completions are served from memory"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(TAG_AUTOCOMPLETE_URL, {'q': 'v'})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(TAG_AUTOCOMPLETE_URL, {'q': 've'})
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_created_tag_is_completed(self):
+        """Tests that creating a tag rebuilds the index"""
+        self.client.get(TAG_AUTOCOMPLETE_URL, {'q': 'veg'})
+
+        Tag.objects.create(user=self.user, name='Vegetarian')
+        res = self.client.get(TAG_AUTOCOMPLETE_URL, {'q': 'veg'})
+
+        self.assertEqual([tag['name'] for tag in res.data], ['Vegetarian'])
+
+    def test_limit_param(self):
+        """Tests the limit param and rejecting an invalid one"""
+        for name in ('Salt', 'Salmon', 'Salsa'):
+            Ingredient.objects.create(user=self.user, name=name)
+
+        res = self.client.get(INGREDIENT_AUTOCOMPLETE_URL,
+                              {'q': 'sal', 'limit': 2})
+        invalid = self.client.get(INGREDIENT_AUTOCOMPLETE_URL,
+                                  {'q': 'sal', 'limit': 'many'})
+
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,158 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.models import Tag, Ingredient, Recipe
+from recipe import bulk
+from recipe.signals import recipes_bulk_written
+from recipe.tests.utils import AuthenticatedClientMixin, create_sample_user
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk-write')
+
+
+def sample_payload(count, **params):
+    """Returns a list of recipe payloads"""
+    items = []
+    for i in range(count):
+        item = {'title': f'Dish {i}', 'time_minutes': 10, 'price': '4.50'}
+        item.update(params)
+        items.append(item)
+    return items
+
+
+class PrivateBulkRecipeAPI(AuthenticatedClientMixin, TestCase):
+    """Tests writing recipes in bulk"""
+
+    def setUp(self):
+        super().setUp()
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(user=self.user,
+                                                    name='Tofu')
+
+    def test_bulk_create_recipes_with_relations(self):
+        """Tests creating recipes with tags and ingredients in bulk"""
+        payload = sample_payload(
+            3,
+            tags=[self.tag.id],
+            ingredients=[self.ingredient.id]
+        )
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data['ids']), 3)
+        for recipe_id, item in zip(res.data['ids'], payload):
+            recipe = Recipe.objects.get(id=recipe_id, user=self.user)
+            self.assertEqual(recipe.title, item['title'])
+            self.assertEqual(list(recipe.tags.all()), [self.tag])
+            self.assertEqual(list(recipe.ingredients.all()),
+                             [self.ingredient])
+
+    def test_bulk_validation_queries_do_not_grow(self):
+        """Tests that references are checked with one query per model"""
+        payload = sample_payload(
+            50,
+            tags=[self.tag.id],
+            ingredients=[self.ingredient.id]
+        )
+        payload[0]['tags'] = [0]
+
+        with self.assertNumQueries(2):
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_reports_errors_per_item(self):
+        """Tests that invalid items are reported and nothing is written"""
+        user2 = create_sample_user('waldek@wp.pl')
+        foreign_tag = Tag.objects.create(user=user2, name='Meat')
+        payload = sample_payload(3)
+        payload[1]['title'] = ''
+        payload[2]['tags'] = [foreign_tag.id]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = res.data['errors']
+        self.assertEqual(errors[0], {})
+        self.assertIn('title', errors[1])
+        self.assertIn('tags', errors[2])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_update_recipes(self):
+        """Tests updating existing recipes and replacing their links"""
+        recipe = Recipe.objects.create(user=self.user, title='Soup',
+                                       time_minutes=20, price=3)
+        recipe.ingredients.add(self.ingredient)
+        payload = [{'id': recipe.id, 'title': 'Tofu soup',
+                    'tags': [self.tag.id], 'ingredients': []}]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Tofu soup')
+        self.assertEqual(recipe.time_minutes, 20)
+        self.assertEqual(list(recipe.tags.all()), [self.tag])
+        self.assertFalse(recipe.ingredients.exists())
+
+    def test_bulk_duplicate_ids_rejected(self):
+        """Tests that a recipe updated twice in a batch is reported"""
+        recipe = Recipe.objects.create(user=self.user, title='Soup',
+                                       time_minutes=20, price=3)
+        payload = [{'id': recipe.id, 'title': 'Tofu soup'},
+                   {'id': recipe.id, 'title': 'Leek soup'}]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['errors'][0], {})
+        self.assertIn('id', res.data['errors'][1])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Soup')
+
+    def test_bulk_update_other_users_recipe_rejected(self):
+        """Tests that recipes of other users cannot be updated"""
+        user2 = create_sample_user('waldek@wp.pl')
+        recipe = Recipe.objects.create(user=user2, title='Soup',
+                                       time_minutes=20, price=3)
+
+        res = self.client.post(BULK_URL, [{'id': recipe.id, 'title': 'Mine'}],
+                               format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Soup')
+
+    @override_settings(RECIPE_BULK_MAX_ITEMS=2)
+    def test_bulk_limits_number_of_items(self):
+        """Tests that oversized batches are rejected"""
+        res = self.client.post(BULK_URL, sample_payload(3), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_invalidates_cached_list(self):
+        """Tests that bulk written recipes show up in the list"""
+        self.client.get(RECIPE_URL)
+
+        self.client.post(BULK_URL, sample_payload(2), format='json')
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_bulk_signal_is_sent_in_the_write_transaction(self):
+        """Tests that a failing receiver rolls the bulk write back"""
+        def fail(**kwargs):
+            raise RuntimeError('Receiver failed')
+        recipes_bulk_written.connect(fail)
+        self.addCleanup(recipes_bulk_written.disconnect, fail)
+
+        with self.assertRaises(RuntimeError):
+            bulk.write_recipes(self.user, [
+                {'title': 'Soup', 'time_minutes': 10, 'price': 4}
+            ])
+
+        self.assertFalse(Recipe.objects.exists())
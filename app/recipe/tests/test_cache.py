@@ -0,0 +1,271 @@
+from django.http import QueryDict
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.models import Tag, Ingredient
+from recipe import cache
+from recipe.tests.utils import AuthenticatedClientMixin, \
+                               create_sample_recipe, create_sample_user
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+INGREDIENT_URL = reverse('recipe:ingredient-list')
+
+
+class NormalizeParamsTests(TestCase):
+    """Tests the canonical form of the cached query params"""
+
+    def test_id_lists_are_sorted_and_deduplicated(self):
+        """Tests that the order of filter ids does not matter"""
+        first = cache.normalize_params(QueryDict('tags=2,1,2&ingredients=3'))
+        second = cache.normalize_params(QueryDict('ingredients=3&tags=1, 2'))
+
+        self.assertEqual(first, second)
+
+    def test_flags_are_booleans(self):
+        """Tests that any non empty assigned_only value is the same flag"""
+        first = cache.normalize_params(QueryDict('assigned_only=1'))
+        second = cache.normalize_params(QueryDict('assigned_only=true'))
+
+        self.assertEqual(first, second)
+
+
+class ListCacheTests(AuthenticatedClientMixin, TestCase):
+    """Tests the cached list responses"""
+
+    def test_repeated_list_is_served_from_cache(self):
+        """Tests that a repeated list call does not hit the database"""
+        create_sample_recipe(user=self.user)
+        res = self.client.get(RECIPE_URL)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(RECIPE_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.data, res.data)
+
+    def test_creating_recipe_invalidates_list(self):
+        """Tests that a new recipe shows up in the cached list"""
+        self.client.get(RECIPE_URL)
+
+        payload = {'title': 'Pierogi', 'time_minutes': 60, 'price': 9.99}
+        self.client.post(RECIPE_URL, payload)
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_deleting_recipe_invalidates_list(self):
+        """Tests that a deleted recipe disappears from the cached list"""
+        recipe = create_sample_recipe(user=self.user)
+        self.client.get(RECIPE_URL)
+
+        self.client.delete(reverse('recipe:recipe-detail', args=[recipe.id]))
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_m2m_change_invalidates_recipes_and_tags(self):
+        """Tests that linking a tag refreshes recipes and assigned tags"""
+        recipe = create_sample_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Soup')
+        self.client.get(RECIPE_URL)
+        self.client.get(TAG_URL, {'assigned_only': 1})
+
+        recipe.tags.add(tag)
+        recipes = self.client.get(RECIPE_URL)
+        tags = self.client.get(TAG_URL, {'assigned_only': 1})
+
+        self.assertEqual(recipes.data['results'][0]['tags'], [tag.id])
+        self.assertEqual(tags.data['results'][0]['id'], tag.id)
+
+    def test_ingredient_change_keeps_tags_cached(self):
+        """Tests that an ingredient write does not drop cached tags"""
+        Tag.objects.create(user=self.user, name='Soup')
+        self.client.get(TAG_URL)
+
+        Ingredient.objects.create(user=self.user, name='Beetroot')
+
+        with self.assertNumQueries(0):
+            self.client.get(TAG_URL)
+        res = self.client.get(INGREDIENT_URL)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_cache_is_per_user(self):
+        """Tests that a user never gets another user's cached list"""
+        create_sample_recipe(user=self.user)
+        self.client.get(RECIPE_URL)
+
+        user2 = create_sample_user('waldek@wp.pl')
+        self.client.force_authenticate(user2)
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_list_eviction_keeps_versions(self):
+        """Tests that the lists are cached apart from the versions"""
+        version = cache.get_version(self.user.id, cache.RECIPES)
+
+        cache.get_cache().clear()
+
+        self.assertEqual(
+            cache.get_version(self.user.id, cache.RECIPES), version
+        )
+
+
+class InvalidateOnCommitTests(TransactionTestCase):
+    """Tests that writes invalidate the cache again once committed"""
+
+    def setUp(self):
+        self.user = create_sample_user()
+
+    def test_list_cached_before_commit_is_orphaned(self):
+        """Tests that entries a concurrent request cached under the
+        version seen before the commit are orphaned by the commit"""
+        with transaction.atomic():
+            create_sample_recipe(user=self.user)
+            version = cache.get_version(self.user.id, cache.RECIPES)
+
+        self.assertGreater(cache.get_version(self.user.id, cache.RECIPES),
+                           version)
+
+
+class ConditionalGetTests(AuthenticatedClientMixin, TestCase):
+    """Tests the ETag and Last-Modified handling of recipes"""
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = create_sample_recipe(user=self.user)
+        self.detail_url = reverse('recipe:recipe-detail',
+                                  args=[self.recipe.id])
+
+    def test_list_not_modified_without_queries(self):
+        """Tests that a matching ETag returns 304 without any query"""
+        res = self.client.get(RECIPE_URL)
+        etag = res['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_weak_etag_matches(self):
+        """Tests that If-None-Match is compared weakly"""
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=f'W/{etag}')
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_depends_on_query_params(self):
+        """Tests that filtered lists have their own ETag"""
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        res = self.client.get(RECIPE_URL, {'page_size': 1},
+                              HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_write_changes_etag(self):
+        """Tests that a changed recipe is sent again"""
+        etag = self.client.get(self.detail_url)['ETag']
+
+        self.client.patch(self.detail_url, {'title': 'Barszcz'})
+        res = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'Barszcz')
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_detail_not_modified_without_queries(self):
+        """Tests that the detail answers 304 before loading the recipe"""
+        etag = self.client.get(self.detail_url)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_wildcard_needs_existing_recipe(self):
+        """Tests that If-None-Match: * matches only an existing recipe"""
+        missing_url = reverse('recipe:recipe-detail',
+                              args=[self.recipe.id + 1000])
+
+        res = self.client.get(missing_url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_reused_etag_is_not_found(self):
+        """Tests that an ETag reused for a foreign or missing recipe
+        does not hide the 404"""
+        etag = self.client.get(self.detail_url)['ETag']
+        missing_url = reverse('recipe:recipe-detail',
+                              args=[self.recipe.id + 1000])
+        user2 = create_sample_user('waldek@wp.pl')
+
+        res = self.client.get(missing_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user2)
+        res = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_detail_if_modified_since(self):
+        """Tests that the detail honours If-Modified-Since"""
+        res = self.client.get(self.detail_url)
+        self.assertIn('Last-Modified', res)
+
+        res = self.client.get(self.detail_url,
+                              HTTP_IF_MODIFIED_SINCE=res['Last-Modified'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_linking_tag_touches_recipe(self):
+        """Tests that changing the tags of a recipe updates updated_at"""
+        updated_at = self.recipe.updated_at
+        tag = Tag.objects.create(user=self.user, name='Soup')
+
+        self.recipe.tags.add(tag)
+        self.recipe.refresh_from_db()
+        self.assertGreater(self.recipe.updated_at, updated_at)
+
+        updated_at = self.recipe.updated_at
+        tag.delete()
+        self.recipe.refresh_from_db()
+        self.assertGreater(self.recipe.updated_at, updated_at)
+
+
+class LocalIndexCacheTests(TestCase):
+    """Tests the indexes kept in the process"""
+
+    def setUp(self):
+        self.indexes = cache.LocalIndexCache()
+        self.builds = []
+
+    def build(self):
+        self.builds.append(len(self.builds))
+        return self.builds[-1]
+
+    def test_index_is_reused_until_invalidated(self):
+        """Tests that an index is only rebuilt for a new version"""
+        self.indexes.get(1, cache.TAGS, self.build)
+        self.indexes.get(1, cache.TAGS, self.build)
+        cache.invalidate(1, cache.TAGS)
+        index = self.indexes.get(1, cache.TAGS, self.build)
+
+        self.assertEqual(index, 1)
+        self.assertEqual(len(self.builds), 2)
+
+    @override_settings(RECIPE_LOCAL_INDEXES_TIMEOUT=0)
+    def test_expired_index_is_rebuilt(self):
+        """Tests that an index is rebuilt after the timeout"""
+        self.indexes.get(1, cache.TAGS, self.build)
+        index = self.indexes.get(1, cache.TAGS, self.build)
+
+        self.assertEqual(index, 1)
@@ -0,0 +1,33 @@
+from django.test import SimpleTestCase, override_settings
+
+from recipe.checks import check_version_cache
+
+
+SHARED_CACHES = {
+    'recipe_versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/tmp/recipe-versions',
+    },
+}
+
+
+class VersionCacheCheckTests(SimpleTestCase):
+    """Tests the check of the data versions cache"""
+
+    @override_settings(RECIPE_VERSION_CACHE_ALLOW_LOCAL=False)
+    def test_local_cache_is_an_error(self):
+        """Tests that a per-process versions cache fails the checks"""
+        errors = check_version_cache(None)
+
+        self.assertEqual([error.id for error in errors], ['recipe.E001'])
+
+    @override_settings(RECIPE_VERSION_CACHE_ALLOW_LOCAL=True)
+    def test_local_cache_allowed(self):
+        """Tests that a local versions cache can be allowed"""
+        self.assertEqual(check_version_cache(None), [])
+
+    @override_settings(RECIPE_VERSION_CACHE_ALLOW_LOCAL=False,
+                       CACHES=SHARED_CACHES)
+    def test_shared_cache_passes(self):
+        """Tests that a cache shared between processes passes"""
+        self.assertEqual(check_version_cache(None), [])
@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.serializers import RecipeExportSerializer
+from recipe.tests.utils import AuthenticatedClientMixin, create_sample_user
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class PublicExportAPI(TestCase):
+    """Tests publicly available export"""
+
+    def test_login_required(self):
+        """Tests that login is required to export recipes"""
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateExportAPI(AuthenticatedClientMixin, TestCase):
+    """Tests exporting the recipes of a user"""
+
+    def setUp(self):
+        super().setUp()
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='Tofu')
+        self.recipes = []
+        for i in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Dish {i}',
+                time_minutes=10,
+                price=4.5,
+                link='http://example.com'
+            )
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+            self.recipes.append(recipe)
+
+    def test_export_ndjson(self):
+        """Tests that every recipe is streamed as one JSON line"""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        expected = RecipeExportSerializer(self.recipes, many=True).data
+        self.assertEqual([json.loads(line) for line in lines],
+                         json.loads(json.dumps(expected)))
+
+    def test_export_csv(self):
+        """Tests that recipes are streamed as CSV rows with names"""
+        res = self.client.get(EXPORT_URL, {'type': 'csv'})
+
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['title'], 'Dish 0')
+        self.assertEqual(rows[0]['tags'], 'Vegan')
+        self.assertEqual(rows[0]['ingredients'], 'Tofu')
+
+    def test_export_only_own_recipes(self):
+        """Tests that other users' recipes are not exported"""
+        user2 = create_sample_user('waldek@wp.pl')
+        self.client.force_authenticate(user2)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(b''.join(res.streaming_content), b'')
+
+    @override_settings(RECIPE_EXPORT_CHUNK_SIZE=2)
+    def test_export_reads_in_chunks(self):
+        """Tests that recipes are read chunk by chunk"""
+        res = self.client.get(EXPORT_URL)
+
+        # 3 chunks and an empty one, each with two prefetch queries
+        with self.assertNumQueries(3 * 3 + 1):
+            lines = b''.join(res.streaming_content).splitlines()
+        self.assertEqual(len(lines), 5)
+
+    def test_export_invalid_type(self):
+        """Tests that unknown export types are rejected"""
+        res = self.client.get(EXPORT_URL, {'type': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
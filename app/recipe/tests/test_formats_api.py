@@ -0,0 +1,101 @@
+import io
+import json
+
+import cbor2
+import msgpack
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.parsers import CBORParser, MessagePackParser
+from core.renderers import CBORRenderer, FastJSONRenderer, \
+                           MessagePackRenderer
+from core.models import Recipe, Tag, Ingredient
+from recipe.serializers import RecipeDetailSerializer
+from recipe.tests.utils import AuthenticatedClientMixin
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+FORMATS = [
+    ('application/msgpack', MessagePackRenderer, MessagePackParser,
+     lambda content: msgpack.unpackb(content, raw=False)),
+    ('application/cbor', CBORRenderer, CBORParser, cbor2.loads),
+]
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class BinaryFormatTests(AuthenticatedClientMixin, TestCase):
+    """Tests the MessagePack and CBOR representations of the API"""
+
+    def setUp(self):
+        super().setUp()
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(user=self.user,
+                                                    name='Żurek')
+        self.recipe = Recipe.objects.create(user=self.user, title='Soup',
+                                            time_minutes=45, price='15.89')
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(self.ingredient)
+
+    def test_round_trip_matches_json(self):
+        """Tests that the formats carry the same data as JSON"""
+        data = RecipeDetailSerializer(self.recipe).data
+        expected = json.loads(FastJSONRenderer().render(data))
+
+        for _, renderer, parser, _loads in FORMATS:
+            content = renderer().render(data)
+            parsed = parser().parse(io.BytesIO(content))
+            self.assertEqual(parsed, expected)
+
+    def test_retrieve_negotiated_by_accept(self):
+        """Tests that the detail is rendered in the accepted format"""
+        expected = self.client.get(detail_url(self.recipe.id)).json()
+
+        for media_type, _, _, loads in FORMATS:
+            res = self.client.get(detail_url(self.recipe.id),
+                                  HTTP_ACCEPT=media_type)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res['Content-Type'], media_type)
+            self.assertEqual(loads(res.content), expected)
+            self.assertLess(len(res.content), len(json.dumps(expected)))
+
+    def test_cached_list_negotiated_by_accept(self):
+        """Tests that a list cached for JSON is rendered as requested"""
+        expected = self.client.get(RECIPE_URL).json()
+
+        for media_type, _, _, loads in FORMATS:
+            res = self.client.get(RECIPE_URL, HTTP_ACCEPT=media_type)
+
+            self.assertEqual(loads(res.content), expected)
+
+    def test_create_from_binary_body(self):
+        """Tests creating a recipe from a binary request body"""
+        payload = {
+            'title': 'Pancakes',
+            'time_minutes': 20,
+            'price': '4.50',
+            'tags': [self.tag.id],
+            'ingredients': [self.ingredient.id],
+        }
+        for media_type, renderer, _, loads in FORMATS:
+            res = self.client.generic('POST', RECIPE_URL,
+                                      renderer().render(payload),
+                                      content_type=media_type,
+                                      HTTP_ACCEPT=media_type)
+
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(loads(res.content)['price'], '4.50')
+
+    def test_invalid_binary_body(self):
+        """Tests that a malformed binary body is rejected"""
+        for media_type, _, _, _loads in FORMATS:
+            res = self.client.generic('POST', RECIPE_URL, b'\xc1\xff',
+                                      content_type=media_type)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
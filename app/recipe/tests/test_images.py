@@ -0,0 +1,336 @@
+import os
+import struct
+import tempfile
+import zlib
+from datetime import timedelta
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+
+from core.models import Recipe
+from core.storage import image_storage
+from recipe import images
+from recipe.tests.utils import AuthenticatedClientMixin, create_sample_recipe
+from recipe.uploads import BoundedFileUploadHandler, UploadTooLarge
+
+
+def create_image_status_url(recipe_id):
+    return reverse('recipe:recipe-image-status', args=[recipe_id])
+
+
+def create_upload_image_url(recipe_id):
+    return reverse('recipe:recipe-image-upload', args=[recipe_id])
+
+
+def png_header(width, height):
+    """Returns a valid PNG claiming the dimensions, but with pixel data
+    for a single row only"""
+    def chunk(kind, data):
+        crc = zlib.crc32(kind + data)
+        return struct.pack('>I', len(data)) + kind + data + \
+            struct.pack('>I', crc)
+
+    return (
+        b'\x89PNG\r\n\x1a\n' +
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)) +
+        chunk(b'IDAT', zlib.compress(b'\x00' * (width + 1))) +
+        chunk(b'IEND', b'')
+    )
+
+
+def exif_orientation(value):
+    """Returns a raw EXIF block holding just the Orientation tag"""
+    return (
+        b'Exif\x00\x00' +
+        b'MM\x00\x2a' + struct.pack('>I', 8) +
+        struct.pack('>H', 1) +
+        struct.pack('>HHIHH', 0x0112, 3, 1, value, 0) +
+        struct.pack('>I', 0)
+    )
+
+
+class RecipeImageProcessingTests(AuthenticatedClientMixin, TestCase):
+    """Tests the processing of uploaded recipe images"""
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = create_sample_recipe(user=self.user)
+
+    def tearDown(self):
+        if self.recipe.image:
+            images.delete_variants(self.recipe.image.name)
+            self.recipe.image.delete()
+
+    def set_image(self, content):
+        self.recipe.image.save('sample.jpg', ContentFile(content))
+        self.recipe.image_status = Recipe.IMAGE_PENDING
+        self.recipe.save()
+
+    def sample_jpeg(self, size=(2000, 1000)):
+        exif = Image.Exif() if hasattr(Image, 'Exif') else None
+        with tempfile.TemporaryFile() as ntf:
+            image = Image.new('RGB', size, 'red')
+            if exif is not None:
+                exif[0x010f] = 'Camera maker'
+                image.save(ntf, format='JPEG', exif=exif.tobytes())
+            else:
+                image.save(ntf, format='JPEG')
+            ntf.seek(0)
+            return ntf.read()
+
+    def test_upload_marks_image_pending(self):
+        """Tests that the upload returns before the image is processed"""
+        url = create_upload_image_url(self.recipe.id)
+
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            res = self.client.post(url, {'image': ntf}, format='multipart')
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_PENDING)
+        self.assertIsNone(res.data['image_variants'])
+
+    def test_upload_moves_last_modified(self):
+        """Tests that the upload is reflected by the detail Last-Modified"""
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            updated_at=timezone.now() - timedelta(days=1)
+        )
+        detail_url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+        before = self.client.get(detail_url)['Last-Modified']
+
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            self.client.post(create_upload_image_url(self.recipe.id),
+                             {'image': ntf}, format='multipart')
+        self.recipe.refresh_from_db()
+        res = self.client.get(detail_url, HTTP_IF_MODIFIED_SINCE=before)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['Last-Modified'], before)
+
+    def test_processing_creates_resized_variants(self):
+        """Tests that every variant fits its size and has no EXIF"""
+        self.set_image(self.sample_jpeg())
+
+        images.process_recipe_image(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+        names = images.variant_names(self.recipe.image.name)
+        for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+            with default_storage.open(names[variant]) as variant_file:
+                variant_image = Image.open(variant_file)
+                self.assertEqual(max(variant_image.size), size)
+                self.assertNotIn('exif', variant_image.info)
+        with default_storage.open(names[images.FULL]) as variant_file:
+            self.assertEqual(Image.open(variant_file).size, (2000, 1000))
+
+    def test_processing_applies_exif_orientation(self):
+        """Tests that the variants of a rotated photo are upright"""
+        with tempfile.TemporaryFile() as ntf:
+            image = Image.new('RGB', (200, 100), 'red')
+            image.paste((0, 0, 255), (0, 0, 100, 100))
+            image.save(ntf, format='JPEG', exif=exif_orientation(6))
+            ntf.seek(0)
+            self.set_image(ntf.read())
+
+        images.process_recipe_image(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        names = images.variant_names(self.recipe.image.name)
+        with default_storage.open(names[images.FULL]) as variant_file:
+            variant_image = Image.open(variant_file)
+            self.assertEqual(variant_image.size, (100, 200))
+            # Rotated clockwise, the blue left half ends up on top
+            red, green, blue = variant_image.convert('RGB') \
+                                            .getpixel((50, 20))
+            self.assertGreater(blue, red)
+            self.assertNotIn('exif', variant_image.info)
+
+    def test_status_lists_variant_urls(self):
+        """Tests that the status endpoint links the processed variants"""
+        self.set_image(self.sample_jpeg(size=(300, 300)))
+        images.process_recipe_image(self.recipe.id)
+
+        res = self.client.get(create_image_status_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_READY)
+        self.assertEqual(
+            set(res.data['image_variants']),
+            set(settings.RECIPE_IMAGE_VARIANTS) | {images.FULL}
+        )
+        self.assertTrue(
+            res.data['image_variants']['thumbnail'].startswith('http://')
+        )
+
+    def test_recipe_serializers_list_variant_urls(self):
+        """Tests that the list and the detail link the variants"""
+        self.set_image(self.sample_jpeg(size=(300, 300)))
+        images.process_recipe_image(self.recipe.id)
+
+        res = self.client.get(reverse('recipe:recipe-list'))
+        listed = res.data['results'][0]['image_variants']
+        res = self.client.get(
+            reverse('recipe:recipe-detail', args=[self.recipe.id])
+        )
+        detailed = res.data['image_variants']
+
+        self.assertEqual(listed, detailed)
+        for variant in ('thumbnail', 'medium', images.FULL):
+            res = self.client.get(detailed[variant])
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertIn('immutable', res['Cache-Control'])
+
+    def test_broken_image_is_marked_failed(self):
+        """Tests that an unreadable image ends up failed"""
+        self.set_image(b'not an image')
+
+        with self.assertLogs('recipe.images', 'ERROR'):
+            images.process_recipe_image(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_FAILED)
+
+
+class RecipeImageUploadLimitTests(AuthenticatedClientMixin, TestCase):
+    """Tests the limits on uploaded recipe images"""
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = create_sample_recipe(user=self.user)
+        self.url = create_upload_image_url(self.recipe.id)
+
+    def upload(self, content, name='sample.png'):
+        upload = SimpleUploadedFile(name, content)
+        return self.client.post(self.url, {'image': upload},
+                                format='multipart')
+
+    @override_settings(RECIPE_IMAGE_MAX_UPLOAD_SIZE=1024)
+    def test_large_file_is_refused(self):
+        """Tests that a body over the limit is refused up front"""
+        res = self.upload(b'\x00' * 256 * 1024)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(res.status_code,
+                         status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(self.recipe.image)
+
+    def test_stream_is_aborted_past_limit(self):
+        """Tests that chunks are refused once they exceed the limit,
+        whatever size the request announced"""
+        handler = BoundedFileUploadHandler(max_size=100)
+        handler.handle_raw_input(None, {}, 10, b'boundary')
+        handler.new_file('image', 'sample.png', 'image/png', None)
+        handler.receive_data_chunk(b'\x00' * 100, 0)
+
+        with self.assertRaises(UploadTooLarge):
+            handler.receive_data_chunk(b'\x00', 100)
+        self.assertTrue(handler.file.closed)
+
+    def test_too_many_pixels_are_refused(self):
+        """Tests that the dimensions are checked from the header"""
+        res = self.upload(png_header(6000, 6000))
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+        self.assertFalse(self.recipe.image)
+
+    def test_decompression_bomb_is_refused(self):
+        """Tests that a 20k x 20k image is refused without decoding it"""
+        res = self.upload(png_header(20000, 20000))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+
+    def test_processing_refuses_stored_bomb(self):
+        """Tests that an oversized image already stored is not decoded"""
+        self.recipe.image.save('bomb.png',
+                               ContentFile(png_header(6000, 6000)))
+        self.addCleanup(self.recipe.image.delete)
+
+        with self.assertLogs('recipe.images', 'ERROR'):
+            images.process_recipe_image(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_FAILED)
+
+
+class ContentAddressedImageTests(AuthenticatedClientMixin, TestCase):
+    """Tests the deduplication and collection of stored images"""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        super().setUp()
+
+    def upload(self, recipe, color):
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (10, 10), color).save(ntf, format='JPEG')
+            ntf.seek(0)
+            self.client.post(create_upload_image_url(recipe.id),
+                             {'image': ntf}, format='multipart')
+        recipe.refresh_from_db()
+        return recipe.image.name
+
+    def test_identical_uploads_share_a_file(self):
+        """Tests that the same photo is stored once for many recipes"""
+        recipe1 = create_sample_recipe(user=self.user)
+        recipe2 = create_sample_recipe(user=self.user, title='Pierogi')
+
+        name1 = self.upload(recipe1, 'red')
+        name2 = self.upload(recipe2, 'red')
+
+        self.assertEqual(name1, name2)
+        self.assertEqual(
+            os.listdir(os.path.dirname(image_storage.path(name1))),
+            [os.path.basename(name1)]
+        )
+
+    def test_collect_garbage_deletes_unreferenced_images(self):
+        """Tests that replaced images and their variants are deleted,
+        while shared ones are kept"""
+        recipe1 = create_sample_recipe(user=self.user)
+        recipe2 = create_sample_recipe(user=self.user, title='Pierogi')
+        shared = self.upload(recipe1, 'red')
+        self.upload(recipe2, 'red')
+        images.process_recipe_image(recipe1.id)
+        replaced = self.upload(recipe1, 'blue')
+        images.process_recipe_image(recipe1.id)
+        self.upload(recipe1, 'green')
+
+        self.assertEqual(images.collect_garbage(), [])
+        deleted = images.collect_garbage(min_age=0)
+
+        self.assertEqual(deleted, [replaced])
+        self.assertFalse(image_storage.exists(replaced))
+        for name in images.variant_names(replaced).values():
+            self.assertFalse(default_storage.exists(name))
+        self.assertTrue(image_storage.exists(shared))
+        for name in images.variant_names(shared).values():
+            self.assertTrue(default_storage.exists(name))
+
+    def test_deleted_recipe_image_is_collected(self):
+        """Tests that the image of a deleted recipe is collected"""
+        recipe = create_sample_recipe(user=self.user)
+        name = self.upload(recipe, 'red')
+
+        recipe.delete()
+
+        self.assertEqual(images.collect_garbage(min_age=0), [name])
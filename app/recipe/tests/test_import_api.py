@@ -0,0 +1,241 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.tests.utils import AuthenticatedClientMixin, create_sample_user
+
+
+IMPORT_URL = reverse('recipe:recipe-import-recipes')
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def ndjson(records):
+    """Returns the records as newline delimited JSON"""
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+
+def sample_records(count, start=0):
+    return [{'title': f'Dish {i}', 'price': '3.50', 'time_minutes': 15,
+             'tags': [{'name': 'Vegan'}], 'ingredients': ['Tofu', 'Rice']}
+            for i in range(start, start + count)]
+
+
+class ImportAPITests(AuthenticatedClientMixin, TestCase):
+    """Tests importing recipes through the API"""
+
+    def upload(self, content, **data):
+        upload = SimpleUploadedFile('recipes', content.encode())
+        return self.client.post(IMPORT_URL, {'file': upload, **data},
+                                format='multipart')
+
+    def test_import_ndjson(self):
+        """Tests importing recipes and resolving names to objects"""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.upload(ndjson(sample_records(3)))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['imported'], 3)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        recipe = Recipe.objects.get(user=self.user, title='Dish 1')
+        self.assertEqual(
+            sorted(recipe.ingredients.values_list('name', flat=True)),
+            ['Rice', 'Tofu']
+        )
+
+    def test_import_csv_export_round_trip(self):
+        """Tests that a CSV export can be imported again"""
+        recipe = Recipe.objects.create(user=self.user, title='Soup',
+                                       time_minutes=30, price=5)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Hot'))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Leek')
+        )
+        export = self.client.get(EXPORT_URL, {'type': 'csv'})
+        content = b''.join(export.streaming_content).decode()
+
+        res = self.upload(content, type='csv')
+
+        self.assertEqual(res.data['imported'], 1)
+        copy = Recipe.objects.exclude(id=recipe.id).get()
+        self.assertEqual(copy.title, 'Soup')
+        self.assertEqual(list(copy.tags.all()), list(recipe.tags.all()))
+
+    def test_import_csv_names_with_separator_round_trip(self):
+        """Tests that names holding the separator or a backslash are
+        exported and imported whole"""
+        names = ['a|b', 'back\\slash', 'end\\']
+        recipe = Recipe.objects.create(user=self.user, title='Soup',
+                                       time_minutes=30, price=5)
+        for name in names:
+            recipe.tags.add(Tag.objects.create(user=self.user, name=name))
+        export = self.client.get(EXPORT_URL, {'type': 'csv'})
+        content = b''.join(export.streaming_content).decode()
+        recipe.delete()
+        Tag.objects.all().delete()
+
+        res = self.upload(content, type='csv')
+
+        self.assertEqual(res.data['imported'], 1)
+        copy = Recipe.objects.get()
+        self.assertEqual(
+            sorted(copy.tags.values_list('name', flat=True)), sorted(names)
+        )
+
+    def test_import_reports_invalid_record(self):
+        """Tests that an invalid record stops the import with its number"""
+        records = sample_records(3)
+        records[2]['title'] = ''
+
+        res = self.upload(ndjson(records))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['record'], 3)
+        self.assertIn('title', res.data['errors'])
+
+    def test_import_resumes_with_skip(self):
+        """Tests that skipped records are not imported again"""
+        res = self.upload(ndjson(sample_records(4)), skip=2)
+
+        self.assertEqual(res.data['imported'], 4)
+        titles = Recipe.objects.values_list('title', flat=True)
+        self.assertEqual(sorted(titles), ['Dish 2', 'Dish 3'])
+
+    def test_import_invalid_json(self):
+        """Tests that malformed lines are reported"""
+        res = self.upload('{"title": \n')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['imported'], 0)
+
+    def test_import_negative_skip(self):
+        """Tests that a negative skip is rejected"""
+        res = self.upload(ndjson(sample_records(2)), skip=-1)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('skip', res.data)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_import_tags_not_a_list(self):
+        """Tests that tags which are not a list are reported"""
+        records = sample_records(2)
+        records[1]['tags'] = 5
+
+        res = self.upload(ndjson(records))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['record'], 2)
+        self.assertIn('tags', res.data['errors'])
+
+    def test_import_tag_object_without_name(self):
+        """Tests that tag objects without a name are reported"""
+        records = sample_records(2)
+        records[0]['tags'] = [{'id': 3}]
+
+        res = self.upload(ndjson(records))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['record'], 1)
+        self.assertIn('tags', res.data['errors'])
+
+    def test_import_ingredient_not_a_name(self):
+        """Tests that ingredients which are not names are reported"""
+        records = sample_records(1)
+        records[0]['ingredients'] = ['Tofu', 7]
+
+        res = self.upload(ndjson(records))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['record'], 1)
+        self.assertIn('ingredients', res.data['errors'])
+
+    def test_import_csv_name_too_long(self):
+        """Tests that overlong names in a CSV file are reported"""
+        content = ('title,price,time_minutes,tags,ingredients\r\n'
+                   f'Soup,5.00,30,Hot|{"x" * 256},Beetroot\r\n')
+
+        res = self.upload(content, type='csv')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['record'], 1)
+        self.assertIn('tags', res.data['errors'])
+        self.assertFalse(Tag.objects.exists())
+
+    @override_settings(RECIPE_IMPORT_CHUNK_SIZE=10, RECIPE_BULK_MAX_ITEMS=2)
+    def test_import_chunks_fit_bulk_limit(self):
+        """Tests that chunks are cut down to the bulk write limit"""
+        res = self.upload(ndjson(sample_records(5)))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['imported'], 5)
+
+
+class ImportCommandTests(TestCase):
+    """Tests the import_recipes management command"""
+
+    def setUp(self):
+        self.user = create_sample_user()
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'recipes.ndjson')
+        self.checkpoint = os.path.join(self.dir.name, 'checkpoint')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, records):
+        with open(self.path, 'w') as records_file:
+            records_file.write(ndjson(records))
+
+    def import_recipes(self, chunk_size=2):
+        out = StringIO()
+        call_command('import_recipes', self.path, email=self.user.email,
+                     chunk_size=chunk_size, checkpoint=self.checkpoint,
+                     stdout=out)
+        return out.getvalue()
+
+    def test_import_commits_chunks_and_reports_progress(self):
+        """Tests that the progress is reported after every chunk"""
+        self.write(sample_records(5))
+
+        out = self.import_recipes()
+
+        self.assertIn('Imported 2 records', out)
+        self.assertIn('Imported 4 records', out)
+        self.assertIn('Imported 5 records', out)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 5)
+
+    def test_import_resumes_from_checkpoint(self):
+        """Tests that a failed import resumes after the last chunk"""
+        records = sample_records(5)
+        records[3]['price'] = 'expensive'
+        self.write(records)
+
+        with self.assertRaises(CommandError):
+            self.import_recipes()
+        self.assertEqual(Recipe.objects.count(), 2)
+
+        records[3]['price'] = '2.00'
+        self.write(records)
+        out = self.import_recipes()
+
+        self.assertIn('Resuming after 2 records', out)
+        self.assertEqual(Recipe.objects.count(), 5)
+
+    @override_settings(RECIPE_BULK_MAX_ITEMS=100)
+    def test_import_chunk_size_above_bulk_limit(self):
+        """Tests that a chunk size above the bulk limit is rejected"""
+        self.write(sample_records(2))
+
+        with self.assertRaisesMessage(CommandError, 'between 1 and 100'):
+            self.import_recipes(chunk_size=10000)
+        self.assertFalse(Recipe.objects.exists())
@@ -52,7 +52,7 @@ class PrivateIngredientAPI(TestCase):
 
         res = self.client.get(INGREDIENT_URL)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
     def test_ingredients_limited_to_authorized_user(self):
@@ -73,8 +73,8 @@ class PrivateIngredientAPI(TestCase):
         res = self.client.get(INGREDIENT_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
 
     def test_created_successfully(self):
         """Tests that ingredients were created successfully"""
@@ -110,12 +110,29 @@ class PrivateIngredientAPI(TestCase):
             user=self.user
         )
         recipe1.ingredients.add(ingredient1)
+        ingredient1.refresh_from_db()
 
         res= self.client.get(INGREDIENT_URL, {"assigned_only": True})
 
         serialized_ingredient1= IngredientSerializer(ingredient1)
         serialized_ingredient2 = IngredientSerializer(ingredient2)
 
-        self.assertIn(serialized_ingredient1.data, res.data)
-        self.assertNotIn(serialized_ingredient2.data , res.data)
-        self.assertTrue(res.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertIn(serialized_ingredient1.data, res.data['results'])
+        self.assertNotIn(serialized_ingredient2.data , res.data['results'])
+        self.assertTrue(res.status_code, status.HTTP_200_OK)
+
+    def test_bulk_upsert_ingredients(self):
+        """Tests getting or creating ingredients by name in bulk"""
+        Ingredient.objects.create(user=self.user, name='Fish')
+        self.client.get(INGREDIENT_URL)
+
+        res = self.client.post(
+            reverse('recipe:ingredient-bulk-upsert'),
+            {'names': ['Fish', 'Chips']},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data), {'Fish', 'Chips'})
+        res = self.client.get(INGREDIENT_URL)
+        self.assertEqual(len(res.data['results']), 2)
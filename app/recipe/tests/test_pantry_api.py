@@ -0,0 +1,120 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.models import Ingredient
+from recipe.pantry import PantryIndex
+from recipe.tests.utils import AuthenticatedClientMixin, \
+                               create_sample_recipe, create_sample_user
+
+
+PANTRY_URL = reverse('recipe:recipe-pantry')
+
+
+class PantryIndexTests(TestCase):
+    """Tests the inverted index of ingredients"""
+
+    def setUp(self):
+        self.index = PantryIndex([
+            (1, 10), (1, 11),
+            (2, 10), (2, 11), (2, 12), (2, 13),
+            (3, 12),
+            (4, 14), (4, 15), (4, 16),
+        ])
+
+    def test_ranks_by_coverage(self):
+        """Tests that the matches are ordered by coverage"""
+        count, matches = self.index.match({10, 11, 12}, 1, 10)
+
+        self.assertEqual(count, 3)
+        self.assertEqual(matches, [(3, 1.0, 0), (1, 1.0, 0), (2, 0.75, 1)])
+
+    def test_small_recipes_match_without_shared_ingredients(self):
+        """Tests that a recipe can qualify only by its missing count"""
+        count, matches = self.index.match(set(), 1, 10)
+
+        self.assertEqual(matches, [(3, 0.0, 1)])
+
+    def test_limit(self):
+        """Tests that the count covers the matches beyond the limit"""
+        count, matches = self.index.match({10, 11, 12}, 1, 1)
+
+        self.assertEqual(count, 3)
+        self.assertEqual(len(matches), 1)
+
+
+class PantryApiTests(AuthenticatedClientMixin, TestCase):
+    """Tests matching recipes with the ingredients at hand"""
+
+    def setUp(self):
+        super().setUp()
+        self.eggs, self.flour, self.milk, self.sugar = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Eggs', 'Flour', 'Milk', 'Sugar')
+        ]
+
+    def test_pantry_ranks_by_coverage(self):
+        """Tests that recipes are ranked by the share of ingredients
+        at hand and list the missing ones"""
+        omelette = create_sample_recipe(self.user, [self.eggs, self.milk],
+                                        title='Omelette')
+        pancakes = create_sample_recipe(
+            self.user, [self.eggs, self.flour, self.milk, self.sugar],
+            title='Pancakes'
+        )
+        create_sample_recipe(self.user, [self.flour, self.sugar],
+                             title='Shortbread')
+
+        res = self.client.get(PANTRY_URL, {
+            'ingredients': f'{self.eggs.id},{self.milk.id},{self.flour.id}',
+            'missing': 1,
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 3)
+        results = res.data['results']
+        self.assertEqual([recipe['id'] for recipe in results][:2],
+                         [omelette.id, pancakes.id])
+        self.assertEqual(results[0]['coverage'], 1.0)
+        self.assertEqual(results[0]['missing'], [])
+        self.assertEqual(results[1]['coverage'], 0.75)
+        self.assertEqual(results[1]['missing'], [self.sugar.id])
+
+    def test_pantry_excludes_recipes_missing_too_much(self):
+        """Tests that recipes missing too many ingredients are left out"""
+        create_sample_recipe(self.user, [self.eggs, self.flour, self.sugar])
+
+        res = self.client.get(PANTRY_URL, {'ingredients': self.eggs.id})
+
+        self.assertEqual(res.data['count'], 0)
+        self.assertEqual(res.data['results'], [])
+
+    def test_pantry_follows_recipe_changes(self):
+        """Tests that the index is rebuilt when ingredients change"""
+        recipe = create_sample_recipe(self.user, [self.eggs, self.flour])
+        self.client.get(PANTRY_URL, {'ingredients': self.eggs.id})
+
+        recipe.ingredients.remove(self.flour)
+        res = self.client.get(PANTRY_URL, {'ingredients': self.eggs.id})
+
+        self.assertEqual([item['id'] for item in res.data['results']],
+                         [recipe.id])
+
+    def test_pantry_is_limited_to_user(self):
+        """Tests that other users' recipes are never matched"""
+        user2 = create_sample_user('waldek@wp.pl')
+        eggs = Ingredient.objects.create(user=user2, name='Eggs')
+        create_sample_recipe(user2, [eggs])
+
+        res = self.client.get(PANTRY_URL, {'ingredients': eggs.id})
+
+        self.assertEqual(res.data['count'], 0)
+
+    def test_invalid_params(self):
+        """Tests that malformed params are rejected"""
+        res = self.client.get(PANTRY_URL, {'ingredients': 'eggs'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(PANTRY_URL, {'missing': 'two'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -11,6 +11,7 @@ from rest_framework.test import APIClient
 
 from core.models import Recipe, Tag, Ingredient
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.tests.utils import AuthenticatedClientMixin
 from decimal import Decimal
 
 
@@ -78,7 +79,7 @@ class PrivateRecipeAPI(TestCase):
 
         res = self.client.get(RECIPE_URL)
 
-        self.assertEqual(serializer.data, res.data)
+        self.assertEqual(serializer.data, res.data['results'])
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
     def test_retrieving_limited_to_request_user(self):
@@ -97,9 +98,9 @@ class PrivateRecipeAPI(TestCase):
 
         res = self.client.get(RECIPE_URL)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data[0]['title'], recipe1.title)
+        self.assertEqual(res.data['results'][0]['title'], recipe1.title)
 
     def test_viewing_recipe_detail(self):
         """Tests for viewing a recipe detail"""
@@ -265,9 +266,9 @@ class RecipeImageAPI(TestCase):
         serializer3 = RecipeSerializer(recipe3)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
 
     def test_filtering_recipes_with_ingredients(self):
         """Testing that only the recipes with ingredients are getting retrieved"""
@@ -288,7 +289,250 @@ class RecipeImageAPI(TestCase):
         serializer3 = RecipeSerializer(recipe3)
 
         self.assertTrue(res.status_code, status.HTTP_200_OK)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
+
+
+class RecipeQueryCountTests(AuthenticatedClientMixin, TestCase):
+    """Tests that the number of queries does not grow with the results"""
+
+    def create_recipes(self, count):
+        """Creating recipes with a tag and an ingredient each"""
+        start = Recipe.objects.count()
+        for i in range(start, start + count):
+            recipe = create_sample_recipe(user=self.user, title=f'Dish {i}')
+            recipe.tags.add(create_sample_tag(self.user, name=f'Tag {i}'))
+            recipe.ingredients.add(
+                create_sample_ingredient(self.user, name=f'Ingredient {i}')
+            )
+
+    def test_list_query_count_is_constant(self):
+        """Tests that listing recipes runs the same queries for 1 or 20"""
+        self.create_recipes(1)
+        with self.assertNumQueries(2):
+            self.client.get(RECIPE_URL)
+
+        self.create_recipes(19)
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(res.data['results']), 20)
+
+    def test_list_filtered_query_count_is_constant(self):
+        """Tests that filtering does not add queries per recipe"""
+        self.create_recipes(10)
+        tags = ','.join(str(tag.id) for tag in Tag.objects.all())
+
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPE_URL, {'tags': tags})
+
+        self.assertEqual(len(res.data['results']), 10)
+
+    def test_detail_query_count(self):
+        """Tests that the recipe detail loads its relations in bulk"""
+        recipe = create_sample_recipe(user=self.user)
+        for i in range(5):
+            recipe.tags.add(create_sample_tag(self.user, name=f'Tag {i}'))
+            recipe.ingredients.add(
+                create_sample_ingredient(self.user, name=f'Ingredient {i}')
+            )
+
+        with self.assertNumQueries(3):
+            res = self.client.get(create_detail_url(recipe.id))
+
+        self.assertEqual(len(res.data['tags']), 5)
+        self.assertEqual(len(res.data['ingredients']), 5)
+
+
+class RecipePaginationTests(AuthenticatedClientMixin, TestCase):
+    """Tests the cursor pagination of the recipe list"""
+
+    def test_page_size_limits_results(self):
+        """Tests that page_size limits the number of returned recipes"""
+        for i in range(5):
+            create_sample_recipe(user=self.user, title=f'Dish {i}')
+
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNotNone(res.data['next'])
+        self.assertIsNone(res.data['previous'])
+
+    def test_following_cursors_returns_every_recipe_once(self):
+        """Tests that walking the next links visits each recipe once"""
+        recipes = [
+            create_sample_recipe(user=self.user, title=f'Dish {i}')
+            for i in range(7)
+        ]
+
+        seen = []
+        res = self.client.get(RECIPE_URL, {'page_size': 3})
+        seen.extend(item['id'] for item in res.data['results'])
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            seen.extend(item['id'] for item in res.data['results'])
 
+        expected = sorted((recipe.id for recipe in recipes), reverse=True)
+        self.assertEqual(seen, expected)
+
+    def test_page_query_count_is_constant(self):
+        """Tests that deeper pages run the same number of queries"""
+        for i in range(6):
+            create_sample_recipe(user=self.user, title=f'Dish {i}')
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+        res = self.client.get(res.data['next'])
+
+        with self.assertNumQueries(2):
+            self.client.get(res.data['next'])
+
+
+class RecipeFilterTests(AuthenticatedClientMixin, TestCase):
+    """Tests filtering recipes by tags and ingredients"""
+
+    def setUp(self):
+        super().setUp()
+        self.tag1 = create_sample_tag(self.user, name='Vegan')
+        self.tag2 = create_sample_tag(self.user, name='Quick')
+        self.ingredient1 = create_sample_ingredient(self.user, name='Tofu')
+        self.ingredient2 = create_sample_ingredient(self.user, name='Rice')
+
+    def test_filter_matching_several_ids_returns_recipe_once(self):
+        """Tests that a recipe matching many ids is not duplicated"""
+        recipe = create_sample_recipe(user=self.user)
+        recipe.tags.add(self.tag1, self.tag2)
+        recipe.ingredients.add(self.ingredient1, self.ingredient2)
+
+        res = self.client.get(RECIPE_URL, {
+            'tags': f'{self.tag1.id},{self.tag2.id}',
+            'ingredients': f'{self.ingredient1.id},{self.ingredient2.id}'
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_filter_match_all_tags(self):
+        """Tests that match=all only returns recipes with every tag"""
+        recipe1 = create_sample_recipe(user=self.user, title='Tofu bowl')
+        recipe1.tags.add(self.tag1, self.tag2)
+        recipe2 = create_sample_recipe(user=self.user, title='Tofu curry')
+        recipe2.tags.add(self.tag1)
+
+        res = self.client.get(RECIPE_URL, {
+            'tags': f'{self.tag1.id},{self.tag2.id}',
+            'match': 'all'
+        })
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [recipe1.id])
+
+    def test_filter_match_all_tags_and_ingredients(self):
+        """Tests that match=all applies to tags and ingredients alike"""
+        recipe1 = create_sample_recipe(user=self.user, title='Tofu bowl')
+        recipe1.tags.add(self.tag1)
+        recipe1.ingredients.add(self.ingredient1, self.ingredient2)
+        recipe2 = create_sample_recipe(user=self.user, title='Tofu curry')
+        recipe2.tags.add(self.tag1)
+        recipe2.ingredients.add(self.ingredient1)
+
+        res = self.client.get(RECIPE_URL, {
+            'tags': f'{self.tag1.id}',
+            'ingredients': f'{self.ingredient1.id},{self.ingredient2.id}',
+            'match': 'all'
+        })
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [recipe1.id])
+
+    def test_filter_invalid_params(self):
+        """Tests that invalid filters are rejected"""
+        res = self.client.get(RECIPE_URL, {'tags': 'vegan'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(RECIPE_URL, {
+            'tags': f'{self.tag1.id}',
+            'match': 'some'
+        })
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeFieldSelectionTests(AuthenticatedClientMixin, TestCase):
+    """Tests the fields and expand params of the recipe endpoints"""
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = create_sample_recipe(user=self.user)
+        self.tag = create_sample_tag(self.user)
+        self.ingredient = create_sample_ingredient(self.user)
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(self.ingredient)
+
+    def test_list_fields_skip_relations(self):
+        """Tests that relations left out of fields are not queried"""
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPE_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'],
+                         [{'id': self.recipe.id, 'title': 'Polish Soup'}])
+
+    def test_list_fields_load_only_their_columns(self):
+        """Tests that the list selects only the requested columns"""
+        with self.assertNumQueries(1) as context:
+            self.client.get(RECIPE_URL, {'fields': 'id,title'})
+
+        sql = context.captured_queries[0]['sql']
+        self.assertIn('"title"', sql)
+        self.assertNotIn('"price"', sql)
+
+    def test_list_fields_with_one_relation(self):
+        """Tests that one selected relation takes one more query"""
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPE_URL, {'fields': 'id,tags'})
+
+        self.assertEqual(res.data['results'],
+                         [{'id': self.recipe.id, 'tags': [self.tag.id]}])
+
+    def test_list_expand_nests_relations(self):
+        """Tests that expanded relations are nested objects"""
+        res = self.client.get(RECIPE_URL, {'expand': 'tags'})
+
+        recipe = res.data['results'][0]
+        self.assertEqual(recipe['tags'], [{
+            'id': self.tag.id,
+            'name': self.tag.name,
+            'recipe_count': 1,
+        }])
+        self.assertEqual(recipe['ingredients'], [self.ingredient.id])
+
+    def test_expand_within_fields(self):
+        """Tests expanding a relation among the selected fields"""
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPE_URL, {
+                'fields': 'title,ingredients',
+                'expand': 'ingredients',
+            })
+
+        self.assertEqual(res.data['results'][0]['ingredients'][0]['name'],
+                         self.ingredient.name)
+        self.assertEqual(set(res.data['results'][0]),
+                         {'title', 'ingredients'})
+
+    def test_detail_fields(self):
+        """Tests selecting the fields of the detail"""
+        with self.assertNumQueries(1):
+            res = self.client.get(create_detail_url(self.recipe.id),
+                                  {'fields': 'title,image_variants'})
+
+        self.assertEqual(res.data, {'title': 'Polish Soup',
+                                    'image_variants': None})
+        self.assertIn('Last-Modified', res)
+
+    def test_unknown_fields(self):
+        """Tests that unknown fields and expansions are rejected"""
+        res = self.client.get(RECIPE_URL, {'fields': 'id,secret'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(RECIPE_URL, {'expand': 'title'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
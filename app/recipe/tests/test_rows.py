@@ -0,0 +1,80 @@
+import json
+
+from django.test import TestCase
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.models import Recipe, Tag, Ingredient
+from recipe import serializers
+from recipe.rows import RowSerializer
+from recipe.tests.utils import create_sample_user
+
+
+class RowSerializerTests(TestCase):
+    """Tests that row serializers match the output of the serializers"""
+
+    def setUp(self):
+        self.user = create_sample_user()
+        self.request = Request(APIRequestFactory().get('/'))
+        tags = [Tag.objects.create(user=self.user, name=name)
+                for name in ('Vegan', 'Dessert', 'Quick')]
+        ingredients = [Ingredient.objects.create(user=self.user, name=name)
+                       for name in ('Eggs', 'Flour')]
+        soup = Recipe.objects.create(user=self.user, title='Soup',
+                                     time_minutes=45, price='15.89')
+        soup.tags.add(tags[2], tags[0])
+        soup.ingredients.add(*ingredients)
+        cake = Recipe.objects.create(user=self.user, title='Cake',
+                                     time_minutes=60, price='7.00',
+                                     image='uploads/recipe/cake.jpg',
+                                     image_status=Recipe.IMAGE_READY)
+        cake.tags.add(tags[1])
+        Recipe.objects.create(user=self.user, title='Toast',
+                              time_minutes=5, price='1.50')
+        Tag.objects.update_recipe_counts()
+        Ingredient.objects.update_recipe_counts()
+
+    def assertSameOutput(self, serializer_class, queryset, **context):
+        """Asserts the rows give the same JSON, key order included"""
+        context['request'] = self.request
+        queryset = queryset.order_by('id')
+        expected = serializer_class(queryset, many=True, context=context)
+        rows = RowSerializer(serializer_class(context=context))
+
+        actual = rows.to_representation(queryset.values(*rows.columns))
+
+        self.assertEqual(json.dumps(actual), json.dumps(expected.data))
+
+    def test_recipe(self):
+        """Tests the rows of the recipe list"""
+        self.assertSameOutput(serializers.RecipeSerializer,
+                              Recipe.objects.all())
+
+    def test_recipe_detail(self):
+        """Tests the rows of the recipe detail"""
+        self.assertSameOutput(serializers.RecipeDetailSerializer,
+                              Recipe.objects.all())
+
+    def test_recipe_selection(self):
+        """Tests the rows with selected and expanded fields"""
+        self.assertSameOutput(serializers.RecipeSerializer,
+                              Recipe.objects.all(),
+                              fields=['title', 'price', 'tags'],
+                              expand=['tags'])
+
+    def test_tag_and_ingredient(self):
+        """Tests the rows of the tag and ingredient lists"""
+        self.assertSameOutput(serializers.TagSerializer, Tag.objects.all())
+        self.assertSameOutput(serializers.IngredientSerializer,
+                              Ingredient.objects.all())
+
+    def test_query_count(self):
+        """Tests that the relations of all rows take one query"""
+        rows = RowSerializer(serializers.RecipeSerializer(
+            context={'request': self.request}
+        ))
+        values = list(Recipe.objects.values(*rows.columns))
+
+        with self.assertNumQueries(1):
+            rows.to_representation(values)
@@ -0,0 +1,93 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.models import Tag, Ingredient
+from recipe.tests.utils import AuthenticatedClientMixin, \
+                               create_sample_recipe, create_sample_user
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+class RecipeSearchTests(AuthenticatedClientMixin, TestCase):
+    """Tests the full-text search of recipes"""
+
+    def search(self, terms, **params):
+        res = self.client.get(RECIPE_URL, dict(params, search=terms))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in res.data['results']]
+
+    def test_search_title(self):
+        """Tests finding recipes by a word of the title"""
+        soup = create_sample_recipe(user=self.user, title='Tomato soup')
+        create_sample_recipe(user=self.user, title='Pancakes')
+
+        self.assertEqual(self.search('soup'), [soup.id])
+
+    def test_search_tags_and_ingredients(self):
+        """Tests finding recipes by tag and ingredient names"""
+        vegan = create_sample_recipe(user=self.user, title='Salad')
+        vegan.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        curry = create_sample_recipe(user=self.user, title='Curry')
+        curry.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Chickpeas')
+        )
+
+        self.assertEqual(self.search('vegan'), [vegan.id])
+        self.assertEqual(self.search('chickpeas'), [curry.id])
+
+    def test_search_needs_every_word(self):
+        """Tests that every searched word has to match"""
+        soup = create_sample_recipe(user=self.user, title='Tomato soup')
+        create_sample_recipe(user=self.user, title='Tomato salad')
+
+        self.assertEqual(self.search('tomato soup'), [soup.id])
+
+    def test_search_orders_by_rank(self):
+        """Tests that a match in the title ranks above one in a tag"""
+        tagged = create_sample_recipe(user=self.user, title='Pasta')
+        tagged.tags.add(Tag.objects.create(user=self.user, name='Tomato'))
+        titled = create_sample_recipe(user=self.user, title='Tomato pasta')
+
+        self.assertEqual(self.search('tomato'), [titled.id, tagged.id])
+
+    def test_search_follows_renamed_tag(self):
+        """Tests that the search sees the current names of tags"""
+        recipe = create_sample_recipe(user=self.user, title='Salad')
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+
+        tag.name = 'Vegetarian'
+        tag.save()
+
+        self.assertEqual(self.search('vegan'), [])
+        self.assertEqual(self.search('vegetarian'), [recipe.id])
+
+    def test_search_is_limited_to_user(self):
+        """Tests that recipes of other users are never found"""
+        user2 = create_sample_user('waldek@wp.pl')
+        create_sample_recipe(user=user2, title='Tomato soup')
+
+        self.assertEqual(self.search('soup'), [])
+
+    def test_search_is_paginated_by_page_number(self):
+        """Tests that ranked results are paged by number"""
+        for number in range(3):
+            create_sample_recipe(user=self.user, title=f'Soup {number}')
+
+        res = self.client.get(RECIPE_URL, {'search': 'soup', 'page_size': 2})
+
+        self.assertEqual(res.data['count'], 3)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIn('page=2', res.data['next'])
+
+    def test_search_combines_with_filters(self):
+        """Tests that the search applies on top of the tag filter"""
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        dinner = create_sample_recipe(user=self.user, title='Tomato soup')
+        dinner.tags.add(tag)
+        create_sample_recipe(user=self.user, title='Mushroom soup')
+
+        self.assertEqual(self.search('soup', tags=tag.id), [dinner.id])
@@ -0,0 +1,154 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.models import Change, Tag, Ingredient, Recipe
+from recipe.tests.utils import AuthenticatedClientMixin, \
+                               create_sample_recipe, create_sample_user
+
+
+SYNC_URL = reverse('recipe:sync-list')
+BULK_URL = reverse('recipe:recipe-bulk-write')
+
+
+class SyncApiTests(AuthenticatedClientMixin, TestCase):
+    """Tests the delta sync of the recipe book"""
+
+    def setUp(self):
+        super().setUp()
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(user=self.user,
+                                                    name='Beetroot')
+        self.recipe = create_sample_recipe(self.user)
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(self.ingredient)
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params['since'] = since
+        res = self.client.get(SYNC_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_first_sync_returns_everything(self):
+        """Tests that a sync without a token lists all objects"""
+        data = self.sync()
+
+        self.assertFalse(data['has_more'])
+        self.assertEqual(data['recipes'], [{
+            'id': self.recipe.id,
+            'title': 'Polish Soup',
+            'price': '15.89',
+            'time_minutes': 45,
+            'ingredients': [self.ingredient.id],
+            'tags': [self.tag.id],
+            'image_variants': None,
+        }])
+        self.assertEqual(data['tags'], [
+            {'id': self.tag.id, 'name': 'Vegan', 'recipe_count': 1}
+        ])
+        self.assertEqual(len(data['ingredients']), 1)
+
+    def test_sync_returns_only_changes(self):
+        """Tests that a sync lists only the changes after the token"""
+        token = self.sync()['token']
+        other = create_sample_recipe(self.user, title='Toast')
+
+        data = self.sync(token)
+
+        self.assertEqual([recipe['id'] for recipe in data['recipes']],
+                         [other.id])
+        self.assertEqual(data['tags'], [])
+        self.assertGreater(int(data['token']), int(token))
+        self.assertEqual(self.sync(data['token'])['recipes'], [])
+
+    def test_membership_changes(self):
+        """Tests that relinking changes the recipe and the counts"""
+        token = self.sync()['token']
+
+        self.recipe.tags.remove(self.tag)
+        data = self.sync(token)
+
+        self.assertEqual(data['recipes'][0]['tags'], [])
+        self.assertEqual(data['tags'][0]['recipe_count'], 0)
+        self.assertEqual(data['ingredients'], [])
+
+    def test_deleted_recipe_tombstone(self):
+        """Tests that a deleted recipe is listed by id"""
+        token = self.sync()['token']
+        recipe_id = self.recipe.id
+
+        self.recipe.delete()
+        data = self.sync(token)
+
+        self.assertEqual(data['recipes'], [])
+        self.assertEqual(data['deleted']['recipes'], [recipe_id])
+        self.assertEqual(data['tags'][0]['recipe_count'], 0)
+
+    def test_deleted_tag_unlinks_recipes(self):
+        """Tests that deleting a tag changes its recipes"""
+        token = self.sync()['token']
+        tag_id = self.tag.id
+
+        self.tag.delete()
+        data = self.sync(token)
+
+        self.assertEqual(data['deleted']['tags'], [tag_id])
+        self.assertEqual(data['recipes'][0]['tags'], [])
+
+    def test_bulk_writes_are_logged(self):
+        """Tests that bulk writes show up in the sync"""
+        token = self.sync()['token']
+
+        res = self.client.post(BULK_URL, [{
+            'id': self.recipe.id,
+            'title': 'Beetroot Soup',
+            'tags': [],
+        }], format='json')
+        data = self.sync(token)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(data['recipes'][0]['title'], 'Beetroot Soup')
+        self.assertEqual(data['recipes'][0]['tags'], [])
+        self.assertEqual(data['tags'][0]['recipe_count'], 0)
+
+    def test_pages(self):
+        """Tests that following the tokens of pages returns every change
+        once the pages run out"""
+        for i in range(5):
+            create_sample_recipe(self.user, title=f'Dish {i}')
+
+        token, recipe_ids, pages = 0, set(), 0
+        while True:
+            data = self.sync(token, page_size=2)
+            recipe_ids.update(recipe['id'] for recipe in data['recipes'])
+            token = data['token']
+            pages += 1
+            if not data['has_more']:
+                break
+
+        self.assertGreater(pages, 3)
+        self.assertEqual(recipe_ids,
+                         set(Recipe.objects.values_list('id', flat=True)))
+
+    def test_sync_is_limited_to_user(self):
+        """Tests that other users' changes are never synced"""
+        user2 = create_sample_user('waldek@wp.pl')
+        token = self.sync()['token']
+        create_sample_recipe(user2)
+
+        self.assertEqual(self.sync(token)['recipes'], [])
+
+    def test_deleting_user_drops_its_log(self):
+        """Tests that the change log goes with its user"""
+        self.user.delete()
+
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Change.objects.exists())
+
+    def test_invalid_token(self):
+        """Tests that a malformed token is rejected"""
+        res = self.client.get(SYNC_URL, {'since': 'yesterday'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
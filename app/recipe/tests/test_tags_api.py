@@ -46,7 +46,7 @@ class PrivateTagsApiTests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_only_tags_for_authenticated_user(self):
         """Tests that only tags for authenticated user are being retrieved"""
@@ -58,9 +58,9 @@ class PrivateTagsApiTests(TestCase):
         tag = Tag.objects.create(user=self.user, name="Noodly")
         res = self.client.get(TAG_URL)
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_create_tag(self):
         """Test creating a new Tag"""
@@ -95,10 +95,169 @@ class PrivateTagsApiTests(TestCase):
             user=self.user
         )
         recipe.tags.add(tag1)
+        tag1.refresh_from_db()
         res = self.client.get(TAG_URL, {"assigned_only": True})
         serialized_tag1 = TagSerializer(tag1)
         serialized_tag2 = TagSerializer(tag2)
 
-        self.assertIn(serialized_tag1.data, res.data)
-        self.assertNotIn(serialized_tag2.data, res.data)
-        self.assertTrue(res.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertIn(serialized_tag1.data, res.data['results'])
+        self.assertNotIn(serialized_tag2.data, res.data['results'])
+        self.assertTrue(res.status_code, status.HTTP_200_OK)
+
+    def test_tags_paginated_by_name(self):
+        """Tests that tags are paged in the name order"""
+        for name in ('Asian', 'Baked', 'Curry', 'Dessert', 'Easy'):
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAG_URL, {'page_size': 2})
+        names = [tag['name'] for tag in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            names.extend(tag['name'] for tag in res.data['results'])
+
+        self.assertEqual(names, ['Easy', 'Dessert', 'Curry', 'Baked', 'Asian'])
+
+    def test_create_duplicate_tag(self):
+        """Test that a user cannot create two tags with the same name"""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.post(TAG_URL, {'name': 'Vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_upsert_tags(self):
+        """Test getting or creating tags by name in bulk"""
+        existing = Tag.objects.create(user=self.user, name='Vegan')
+        user2 = get_user_model().objects.create_user(
+            email='user2@wp.pl',
+            password='correctpass'
+        )
+        Tag.objects.create(user=user2, name='Quick')
+
+        res = self.client.post(
+            reverse('recipe:tag-bulk-upsert'),
+            {'names': ['Vegan', 'Quick', 'Spicy', 'Quick']},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        tags = Tag.objects.filter(user=self.user)
+        self.assertEqual(res.data, dict(tags.values_list('name', 'id')))
+        self.assertEqual(res.data['Vegan'], existing.id)
+        self.assertEqual(tags.count(), 3)
+
+    def test_bulk_upsert_invalid_names(self):
+        """Test that the names are validated"""
+        res = self.client.post(
+            reverse('recipe:tag-bulk-upsert'),
+            {'names': ['']},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_recipe_count_follows_links(self):
+        """Tests that recipe_count is kept current by the m2m changes"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipes = [
+            Recipe.objects.create(user=self.user, title=title,
+                                  time_minutes=10, price=5)
+            for title in ('Salad', 'Curry', 'Soup')
+        ]
+
+        for recipe in recipes:
+            recipe.tags.add(tag)
+        recipes[0].tags.add(tag)
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 3)
+
+        recipes[0].tags.remove(tag)
+        recipes[0].tags.remove(tag)
+        recipes[1].tags.clear()
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 1)
+
+        recipes[2].delete()
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 0)
+
+        tag.recipe_set.add(*recipes[:2])
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 2)
+
+    def test_recipe_count_follows_bulk_writes(self):
+        """Tests that bulk written links are counted"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+
+        self.client.post(reverse('recipe:recipe-bulk-write'), [
+            {'title': 'Salad', 'time_minutes': 10, 'price': '5.00',
+             'tags': [tag.id]},
+        ], format='json')
+
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 1)
+
+    def test_tags_ordered_by_count(self):
+        """Tests paging the tags from the most used one"""
+        counts = {'Asian': 2, 'Baked': 0, 'Curry': 3, 'Dessert': 1}
+        for name, count in counts.items():
+            tag = Tag.objects.create(user=self.user, name=name)
+            for number in range(count):
+                Recipe.objects.create(
+                    user=self.user, title=f'{name} {number}',
+                    time_minutes=10, price=5
+                ).tags.add(tag)
+
+        res = self.client.get(TAG_URL, {'ordering': 'count', 'page_size': 2})
+        tags = res.data['results']
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            tags.extend(res.data['results'])
+
+        self.assertEqual([tag['name'] for tag in tags],
+                         ['Curry', 'Asian', 'Dessert', 'Baked'])
+        self.assertEqual([tag['recipe_count'] for tag in tags], [3, 2, 1, 0])
+
+    def test_count_ordering_pages_through_ties(self):
+        """Tests that more tied counts than the offset cutoff are all
+        paged through once"""
+        Tag.objects.bulk_create(
+            Tag(user=self.user, name=f'Tag {i}') for i in range(1300)
+        )
+
+        res = self.client.get(TAG_URL, {
+            'ordering': 'count',
+            'page_size': 100,
+        })
+        ids = [tag['id'] for tag in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids.extend(tag['id'] for tag in res.data['results'])
+
+        self.assertEqual(len(ids), 1300)
+        self.assertEqual(ids, sorted(set(ids), reverse=True))
+
+    def test_count_ordering_pages_back(self):
+        """Tests that the previous links of the count ordering return
+        the same pages"""
+        tags = [Tag.objects.create(user=self.user, name=f'Tag {i}')
+                for i in range(5)]
+        recipe = Recipe.objects.create(
+            user=self.user, title='Curry', time_minutes=10, price=5
+        )
+        recipe.tags.add(tags[1], tags[3])
+
+        pages = [self.client.get(TAG_URL, {
+            'ordering': 'count',
+            'page_size': 2,
+        }).data]
+        while pages[-1]['next']:
+            pages.append(self.client.get(pages[-1]['next']).data)
+        previous = self.client.get(pages[-1]['previous']).data
+
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(
+            [tag['recipe_count'] for tag in pages[0]['results']], [1, 1]
+        )
+        self.assertEqual(previous['results'], pages[1]['results'])
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+
+def create_sample_user(email='seba@wp.pl', password='correctpass'):
+    """Creating a sample User"""
+    return get_user_model().objects.create_user(
+        email=email,
+        password=password
+    )
+
+
+def create_sample_recipe(user, ingredients=(), **params):
+    """Creating a sample Recipe with the ingredients"""
+    defaults = {
+        'title': 'Polish Soup',
+        'time_minutes': 45,
+        'price': 15.89
+    }
+    defaults.update(params)
+    recipe = Recipe.objects.create(user=user, **defaults)
+    if ingredients:
+        recipe.ingredients.add(*ingredients)
+    return recipe
+
+
+class AuthenticatedClientMixin:
+    """Sets up a sample user and an API client authenticated as it"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_sample_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
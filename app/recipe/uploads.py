@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.parsers import MultiPartParser
+
+
+# Room for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _('The uploaded file is too large.')
+    default_code = 'upload_too_large'
+
+
+class BoundedFileUploadHandler(TemporaryFileUploadHandler):
+    """Streams uploaded files to temporary files, aborting the upload
+    as soon as it grows past `max_size` bytes.
+
+    A request that announces a larger body is refused before a single
+    chunk is read.
+    """
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size or settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE
+        self.received = 0
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        if content_length > self.max_size + MULTIPART_OVERHEAD:
+            raise UploadTooLarge()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            self.file.close()
+            raise UploadTooLarge()
+        super().receive_data_chunk(raw_data, start)
+
+
+class BoundedMultiPartParser(MultiPartParser):
+    """Multipart parser that never buffers files in memory"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        request.upload_handlers = [BoundedFileUploadHandler(request)]
+        return super().parse(stream, media_type, parser_context)
@@ -1,73 +1,233 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
 
 from core.models import Tag, Ingredient, Recipe
-from recipe import serializers
+from recipe import bulk, cache, images, search, serializers, sync
+from recipe.autocomplete import complete_names
+from recipe.export import EXPORT_FORMATS
+from recipe.pantry import match_pantry
+from recipe.imports import RECORD_READERS, RecipeImportError, \
+                           import_records
+from recipe.cache import CachedListMixin, ConditionalGetMixin
+from recipe.rows import RowListMixin
+from recipe.pagination import RecipeAttrCursorPagination, \
+                              RecipeSearchPagination
+from recipe.uploads import BoundedMultiPartParser
+from user.authentication import CachingTokenAuthentication
 
 
-class BasicRecipeAttrViewSet(viewsets.GenericViewSet,
-                 mixins.ListModelMixin,
-                 mixins.CreateModelMixin):
+RELATIONS = ('tags', 'ingredients')
+
+
+class BasicRecipeAttrViewSet(CachedListMixin,
+                             RowListMixin,
+                             viewsets.GenericViewSet,
+                             mixins.ListModelMixin,
+                             mixins.CreateModelMixin):
 
     """Manage objects in database"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachingTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeAttrCursorPagination
 
     def get_queryset(self):
         assigned_only = bool(self.request.query_params.get("assigned_only"))
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = queryset.filter(recipe_count__gt=0)
         return queryset.filter(user=self.request.user).order_by('-name')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(methods=['POST'], detail=False, url_path='bulk-upsert')
+    def bulk_upsert(self, request):
+        """Returns the ids of the named objects, creating missing ones"""
+        serializer = serializers.NameListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = bulk.get_or_create_by_names(
+            self.queryset.model,
+            request.user,
+            serializer.validated_data['names']
+        )
+        return Response(ids, status=status.HTTP_200_OK)
+
+    @action(methods=['GET'], detail=False, url_path='autocomplete')
+    def autocomplete(self, request):
+        """Returns the objects whose names start with `q`, followed by
+        the ones a typo away, without querying the database"""
+        try:
+            limit = int(request.query_params.get(
+                'limit',
+                settings.RECIPE_AUTOCOMPLETE_LIMIT
+            ))
+        except ValueError:
+            raise ValidationError({
+                'limit': [_('A valid integer is required.')]
+            })
+        limit = max(1, min(limit, settings.RECIPE_AUTOCOMPLETE_MAX_LIMIT))
+        matches = complete_names(
+            self.queryset.model,
+            request.user.id,
+            self.cache_scope,
+            request.query_params.get('q', ''),
+            limit
+        )
+        return Response([{'id': id_, 'name': name} for id_, name in matches])
+
 
 class TagViewSet(BasicRecipeAttrViewSet):
 
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    cache_scope = cache.TAGS
 
 
 class IngredientViewSet(BasicRecipeAttrViewSet):
 
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    cache_scope = cache.INGREDIENTS
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin,
+                    CachedListMixin,
+                    RowListMixin,
+                    viewsets.ModelViewSet):
     """Manage Recipe objects in the database"""
 
     queryset = Recipe.objects.all()
     serializer_class = serializers.RecipeSerializer
+    cache_scope = cache.RECIPES
     permission_classes = (IsAuthenticated,)
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachingTokenAuthentication,)
 
     def _string_params_to_int(self, string_params):
-        return [int(param) for param in string_params.split(',')]
+        try:
+            return [int(param) for param in string_params.split(',')]
+        except ValueError:
+            raise ValidationError(_('Expected a comma separated list of ids'))
+
+    def _match_all(self):
+        match = self.request.query_params.get('match', 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError(_('match must be either any or all'))
+        return match == 'all'
 
     def get_queryset(self):
+        """Retrieves the recipes of the user.
+
+        `tags` and `ingredients` take comma separated ids. With the
+        default `match=any` a recipe needs one of the ids of each given
+        filter, with `match=all` it needs every one of them. `search`
+        takes words to find in titles, tags and ingredients and orders
+        the recipes by relevance.
+        """
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
+        terms = self._search_terms()
         queryset = self.queryset
+        if tags or ingredients:
+            match_all = self._match_all()
         if tags:
             tags_id = self._string_params_to_int(tags)
-            queryset = queryset.filter(tags__id__in=tags_id)
+            queryset = queryset.with_tags(tags_id, match_all)
         if ingredients:
             ingredients_id = self._string_params_to_int(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredients_id)
-        return queryset.filter(user=self.request.user)
+            queryset = queryset.with_ingredients(ingredients_id, match_all)
+        queryset = self._apply_action_plan(queryset)
+        queryset = queryset.filter(user=self.request.user)
+        if terms:
+            return search.get_engine().search(queryset, terms) \
+                                      .order_by('-search_rank', '-id')
+        return queryset.order_by('-id')
+
+    def _search_terms(self):
+        return self.request.query_params.get('search', '').strip()
+
+    @property
+    def paginator(self):
+        """Pages search results by number, as they are ordered by rank"""
+        if not hasattr(self, '_paginator') and self._search_terms():
+            self._paginator = RecipeSearchPagination()
+        return super().paginator
+
+    def _names_param(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+    def _selection(self):
+        """Returns the field names requested with `fields`, None for all
+        of them, and the relations to nest requested with `expand`.
+
+        Only list and retrieve take a selection, the other actions
+        always serialize every field.
+        """
+        if self.action not in ('list', 'retrieve'):
+            return None, []
+        if not hasattr(self, '_selected'):
+            fields = self._names_param('fields')
+            expand = self._names_param('expand') or []
+            self.get_serializer_class().check_selection(fields, expand)
+            self._selected = fields, expand
+        return self._selected
+
+    def _selected_relations(self):
+        fields, _expand = self._selection()
+        return [name for name in RELATIONS
+                if fields is None or name in fields]
+
+    def _apply_action_plan(self, queryset):
+        """Loads only what the serializer of the current action reads.
+
+        Relations left out of `fields` are not prefetched at all. Lists
+        are loaded as rows by the RowListMixin.
+        """
+        if self.action == 'retrieve':
+            fields, _expand = self._selection()
+            queryset = queryset.with_relations(
+                objects=self._selected_relations()
+            )
+            if fields is not None:
+                columns = self.get_serializer_class().get_columns(fields)
+                queryset = queryset.only(
+                    'id', 'updated_at', *(columns - set(RELATIONS))
+                )
+            return queryset
+        if self.action == 'pantry':
+            return queryset.with_related_ids()
+        if self.action in ('image_upload', 'image_status'):
+            return queryset.only('id', 'user_id', 'image', 'image_status',
+                                 'updated_at')
+        return queryset
+
+    def get_last_modified(self, instance):
+        """Includes the nested tags and ingredients of the detail view"""
+        dates = [instance.updated_at]
+        for name in self._selected_relations():
+            dates.extend(related.updated_at
+                         for related in getattr(instance, name).all())
+        return max(dates)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'], context['expand'] = self._selection()
+        return context
 
     def get_serializer_class(self):
 
         if self.action == 'retrieve':
             return serializers.RecipeDetailSerializer
-        elif self.action == 'image_upload':
+        elif self.action in ('image_upload', 'image_status'):
             return serializers.RecipeImageSerializer
         return self.serializer_class
 
@@ -75,16 +235,130 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Creates a Recipe in db"""
         return serializer.save(user=self.request.user)
 
-    @action(methods=['POST'], detail=True, url_path='image-upload')
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk_write(self, request):
+        """Creating and updating many recipes in one transaction"""
+        validated, existing = bulk.validate_recipes(request.user, request.data)
+        recipe_ids = bulk.write_recipes(request.user, validated, existing)
+        created = any('id' not in data for data in validated)
+        return Response(
+            {'ids': recipe_ids},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    def _int_param(self, name, default, maximum):
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: [_('A valid integer is required.')]})
+        return max(0, min(value, maximum))
+
+    @action(methods=['GET'], detail=False, url_path='pantry')
+    def pantry(self, request):
+        """Ranking the recipes by the share of their ingredients in the
+        `ingredients` ids, among those missing at most `missing` ones"""
+        ingredients = request.query_params.get('ingredients')
+        pantry = self._string_params_to_int(ingredients) \
+            if ingredients else []
+        max_missing = self._int_param('missing', 0, 1000)
+        limit = self._int_param('limit', settings.RECIPE_PANTRY_LIMIT,
+                                settings.RECIPE_PANTRY_MAX_LIMIT)
+
+        count, matches = match_pantry(request.user.id, pantry,
+                                      max_missing, limit)
+        recipes = self._apply_action_plan(self.queryset).filter(
+            user=request.user,
+            id__in=[match[0] for match in matches]
+        ).in_bulk()
+        pantry = set(pantry)
+        results = []
+        for recipe_id, coverage, missing_count in matches:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                continue
+            recipe.coverage = coverage
+            recipe.missing = [ingredient.id
+                              for ingredient in recipe.ingredients.all()
+                              if ingredient.id not in pantry]
+            results.append(recipe)
+
+        serializer = serializers.PantryMatchSerializer(
+            results,
+            many=True,
+            context=self.get_serializer_context()
+        )
+        return Response({'count': count, 'results': serializer.data})
+
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """Streaming all recipes of the user as NDJSON or CSV"""
+        export_type = request.query_params.get('type', 'ndjson')
+        if export_type not in EXPORT_FORMATS:
+            raise ValidationError(_('type must be either ndjson or csv'))
+        iter_content, content_type = EXPORT_FORMATS[export_type]
+
+        response = StreamingHttpResponse(
+            iter_content(request.user),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = \
+            f'attachment; filename="recipes.{export_type}"'
+        return response
+
+    @action(methods=['POST'], detail=False, url_path='import')
+    def import_recipes(self, request):
+        """Importing an uploaded NDJSON or CSV file chunk by chunk"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': [_('No file was submitted.')]})
+        import_type = request.data.get('type', 'ndjson')
+        if import_type not in RECORD_READERS:
+            raise ValidationError(_('type must be either ndjson or csv'))
+        try:
+            skip = int(request.data.get('skip', 0))
+        except ValueError:
+            raise ValidationError({
+                'skip': [_('A valid integer is required.')]
+            })
+        if skip < 0:
+            raise ValidationError({
+                'skip': [_('Ensure this value is greater than or equal '
+                           'to 0.')]
+            })
+
+        lines = (line.decode('utf-8') for line in upload)
+        try:
+            imported = import_records(
+                request.user,
+                RECORD_READERS[import_type](lines),
+                skip=skip
+            )
+        except RecipeImportError as error:
+            return Response({
+                'imported': error.imported,
+                'record': error.record,
+                'errors': error.errors,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except UnicodeDecodeError:
+            raise ValidationError({'file': [_('Expected UTF-8 content.')]})
+        return Response({'imported': imported}, status=status.HTTP_200_OK)
+
+    @action(methods=['POST'], detail=True, url_path='image-upload',
+            parser_classes=(BoundedMultiPartParser,))
     def image_upload(self, request, pk=None):
-        """Uploading an image"""
+        """Uploading an image, the variants are processed afterwards.
+
+        The file is streamed to disk and refused once it exceeds
+        RECIPE_IMAGE_MAX_UPLOAD_SIZE.
+        """
         recipe = self.get_object()
         serializer = self.get_serializer(
             recipe,
             data=request.data
         )
         if serializer.is_valid():
-            serializer.save()
+            serializer.save(image_status=Recipe.IMAGE_PENDING)
+            images.schedule_processing(recipe)
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK
@@ -94,5 +368,41 @@ class RecipeViewSet(viewsets.ModelViewSet):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    @action(methods=['GET'], detail=True, url_path='image-status')
+    def image_status(self, request, pk=None):
+        """Returning the processing status and the image variants"""
+        serializer = self.get_serializer(self.get_object())
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class SyncViewSet(viewsets.GenericViewSet):
+    """Changes of the recipes, tags and ingredients of the user"""
+    authentication_classes = (CachingTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def _int_param(self, name, default, minimum, maximum):
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: [_('A valid integer is required.')]})
+        return max(minimum, min(value, maximum))
 
+    def list(self, request):
+        """Returning what changed after the `since` token.
 
+        Created and updated recipes, tags and ingredients come as their
+        list endpoints represent them, so relinked recipes come with
+        their current tags and ingredients, and deleted ones by id. A
+        page holds at most `page_size` changes. Without `since` all the
+        logged changes are returned, from the oldest.
+        """
+        since = self._int_param('since', 0, 0, 2 ** 63 - 1)
+        page_size = self._int_param('page_size',
+                                    settings.RECIPE_SYNC_PAGE_SIZE,
+                                    1, settings.RECIPE_SYNC_MAX_PAGE_SIZE)
+        return Response(sync.changes_since(
+            request.user,
+            since,
+            page_size,
+            self.get_serializer_context()
+        ))
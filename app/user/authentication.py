@@ -0,0 +1,73 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def get_cache():
+    return caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+
+
+def token_cache_key(key):
+    """Returns the cache key of a token without exposing the token"""
+    return 'auth:token:%s' % hashlib.sha256(key.encode()).hexdigest()
+
+
+def forget_token(key):
+    get_cache().delete(token_cache_key(key))
+
+
+def _cached_fields(model):
+    """Returns the fields of the model kept in the cache, every concrete
+    field but the password hash"""
+    return [field.attname for field in model._meta.concrete_fields
+            if field.attname != 'password']
+
+
+def _from_cached(model, values):
+    """Returns an instance of the model from its cached fields, the
+    others are deferred and loaded when accessed"""
+    fields = _cached_fields(model)
+    return model.from_db(model.objects.db, fields,
+                         [values[field] for field in fields])
+
+
+def _to_cached(instance):
+    return {field: getattr(instance, field)
+            for field in _cached_fields(type(instance))}
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the token with its user.
+
+    Only the columns of the token and of the user are cached, never the
+    password hash, which stays deferred. Entries expire after
+    AUTH_TOKEN_CACHE_TIMEOUT seconds and are dropped as soon as the
+    token is deleted or its user is saved. They are dropped from the
+    AUTH_TOKEN_CACHE_ALIAS cache only, so unless that cache is shared
+    between the workers, the other workers accept a deleted token or
+    deactivated user for up to AUTH_TOKEN_CACHE_TIMEOUT seconds.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        cached = get_cache().get(cache_key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            get_cache().set(
+                cache_key,
+                {'token': _to_cached(token), 'user': _to_cached(user)},
+                settings.AUTH_TOKEN_CACHE_TIMEOUT
+            )
+            return (user, token)
+
+        user = _from_cached(get_user_model(), cached['user'])
+        if not user.is_active:
+            forget_token(key)
+            return super().authenticate_credentials(key)
+        token = _from_cached(Token, cached['token'])
+        token.user = user
+        return (user, token)
@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import forget_token, get_cache, token_cache_key
+
+
+ME_URL = reverse('user:me')
+
+
+class CachingTokenAuthenticationTests(TestCase):
+    """Tests the cached token authentication"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='seba@wp.pl',
+            password='correctpass',
+            name='Seba'
+        )
+        self.token = Token.objects.create(user=self.user)
+        forget_token(self.token.key)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_authenticated_user_is_cached(self):
+        """Tests that repeated requests do not look the token up again"""
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_invalid_token_rejected(self):
+        """Tests that unknown tokens are still rejected"""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected(self):
+        """Tests that a deleted token stops working immediately"""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Tests that a deactivated user is rejected immediately"""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_refreshes_cached_user(self):
+        """Tests that a password change drops the cached user"""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'Sebastian',
+                                   'password': 'newpassword'})
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.data['name'], 'Sebastian')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('newpassword'))
+
+    def test_password_hash_is_not_cached(self):
+        """Tests that the cached entry leaves out the password hash"""
+        self.client.get(ME_URL)
+
+        cached = get_cache().get(token_cache_key(self.token.key))
+
+        self.assertEqual(cached['user']['email'], self.user.email)
+        self.assertNotIn('password', cached['user'])
+        self.assertNotIn(self.user.password, repr(cached))
+
+    def test_cached_user_update_keeps_password(self):
+        """Tests that saving the cached user leaves its password alone"""
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {'name': 'Sebastian'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'Sebastian')
+        self.assertTrue(self.user.check_password('correctpass'))
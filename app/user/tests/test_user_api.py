@@ -1,3 +1,4 @@
+import msgpack
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
@@ -65,6 +66,20 @@ class PublicUserApiTest(TestCase):
         self.assertIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_create_token_with_msgpack(self):
+        """Test that the token endpoint negotiates MessagePack"""
+        payload = {"email": "batianm@outlook.com",
+                   "password": "seba6m6"}
+        create_user(**payload)
+        res = self.client.generic('POST', TOKEN_URL,
+                                  msgpack.packb(payload, use_bin_type=True),
+                                  content_type='application/msgpack',
+                                  HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        self.assertIn('token', msgpack.unpackb(res.content, raw=False))
+
     def test_create_token_invalid_credentials(self):
         """Test that token is not created if the invalid
         credentials are given"""
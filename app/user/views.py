@@ -1,4 +1,5 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
+from user.authentication import CachingTokenAuthentication
 from user.serializers import UserSerializer, AuthTokenSerializer
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
@@ -14,12 +15,13 @@ class TokenCreateAPI(ObtainAuthToken):
     user makes request to the API"""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
 
 
 class UserManageAPI(generics.RetrieveUpdateAPIView):
     """Retrieve an authenticated user and updating his profile"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachingTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):